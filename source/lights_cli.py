@@ -0,0 +1,89 @@
+"""
+(c) Vitaly Smirnov [VSdev]
+mrmaybelately@gmail.com
+https://github.com/vitsmirnov
+2024
+"""
+
+# Headless tools (there is no pygame here), e.g.:
+#   python lights_cli.py generate -W 20 -H 15 --go-through -n 1000 -o boards.txt
+
+import argparse
+import sys
+import time
+
+from lights_core import LevelData, MazeAlgorithm, Net
+from lights_levels import (SEED_MAX, SEED_MIN, generate_boards, generate_level_pack,
+    write_boards_text, write_level_pack)
+
+
+def main(argv: list[str] | None=None) -> int:
+    parser = argparse.ArgumentParser(prog="lights_cli",
+        description="Turn on the Lights - headless tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="generate boards of a level")
+    generate.add_argument("-W", "--width", type=int, default=Net.DEFAULT_WIDTH)
+    generate.add_argument("-H", "--height", type=int, default=Net.DEFAULT_HEIGHT)
+    generate.add_argument("-g", "--go-through", action="store_true")
+    generate.add_argument("-a", "--algorithm", default=MazeAlgorithm.DFS.name,
+        choices=[a.name for a in MazeAlgorithm], type=str.upper)
+    generate.add_argument("-u", "--unique", action="store_true",
+        help="only boards with the only solution (seeds without them are skipped, "
+             "it's about twice as slow)")
+    generate.add_argument("-s", "--seed", type=int, default=0,
+        help="seed of the first board (the next ones are seed+1, seed+2, ...)")
+    generate.add_argument("-n", "--count", type=int, default=1)
+    generate.add_argument("-o", "--output", default="boards.txt")
+    generate.add_argument("-f", "--format", choices=["text", "pack"], default=None,
+        help="output format (by default it's \"pack\" for *.lpk files and \"text\" otherwise)")
+    generate.add_argument("-j", "--workers", type=int, default=1,
+        help="number of worker processes (0 - number of CPUs, 1 - no workers)")
+    generate.add_argument("--chunk-size", type=int, default=64,
+        help="number of boards per task for a worker")
+    generate.set_defaults(func=run_generate)
+
+    args = parser.parse_args(argv)
+    if args.command == "generate":  # before the output file is opened
+        if args.workers < 0:
+            generate.error("argument -j/--workers: should be 0 or more")
+        if args.chunk_size < 1:
+            generate.error("argument --chunk-size: should be 1 or more")
+    return args.func(args)
+
+
+def run_generate(args: argparse.Namespace) -> int:
+    if not (Net.MIN_WIDTH <= args.width <= Net.MAX_WIDTH
+            and Net.MIN_HEIGHT <= args.height <= Net.MAX_HEIGHT):
+        print(f"Error: field size should be from {Net.MIN_WIDTH}x{Net.MIN_HEIGHT} "
+              f"to {Net.MAX_WIDTH}x{Net.MAX_HEIGHT}.", file=sys.stderr)
+        return 2
+    if not (SEED_MIN <= args.seed and args.seed + args.count - 1 <= SEED_MAX):
+        print(f"Error: seeds should be from {SEED_MIN} to {SEED_MAX}.", file=sys.stderr)
+        return 2
+    level = LevelData((args.width, args.height), args.go_through,
+        MazeAlgorithm[args.algorithm], unique=args.unique)
+    seeds = range(args.seed, args.seed + args.count)
+
+    if args.workers == 1:
+        boards = generate_boards(level, seeds)
+    else:
+        boards = generate_level_pack(level, seeds, args.workers or None,
+            args.chunk_size)
+
+    start_time = time.perf_counter()
+    output_format = args.format or ("pack" if args.output.endswith(".lpk") else "text")
+    if output_format == "pack":
+        count = write_level_pack(args.output, boards)
+    else:
+        count = write_boards_text(args.output, level, boards)
+    duration = time.perf_counter() - start_time
+    print(f"{count} boards have been written to \"{args.output}\" ({duration:.2f} s).")
+    if count < args.count:
+        print(f"{args.count - count} seeds have been skipped "
+              f"(there are no unique boards for them).")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -6,17 +6,29 @@ https://github.com/vitsmirnov
 """
 
 from enum import Enum
-from random import randint, choice
+from random import Random
 from copy import deepcopy
 from dataclasses import dataclass, field
-from functools import singledispatchmethod
+from functools import singledispatchmethod, lru_cache
+from threading import Event, Thread
+from concurrent.futures import Future
+
+from lights_mazes import MazeAlgorithm, generate_maze
+from lights_solver import Solver, HintTracker, make_unique, min_turns
+
+try:  # NumPy is optional (it's used for updating big nets only)
+    import numpy as np
+except ImportError:
+    np = None
 
 
 # classes list
 class Point: ...
 class Direction: ...
 class Fork: ...
+class ForkView: ...
 class Cell: ...
+class CellView: ...
 class Net: ...
 class LevelData: ...
 class Engine: ...
@@ -83,48 +95,84 @@ class Direction(Enum):  # Should it be IntEnum?
         return self == other.opposite
 
 
+# Fork tables. A fork is a 4-bit mask: bit N is set if Direction(N) is in the fork.
+# All the fork operations are lookups in these tables (they are built once).
+FORK_MASKS_COUNT = 1 << len(Direction)  # 16
+FORK_FULL_MASK = FORK_MASKS_COUNT - 1
+
+def _rotated_mask(mask: int, turn: int) -> int:
+    return ((mask << turn) | (mask >> (len(Direction) - turn))) & FORK_FULL_MASK
+
+# [mask][turn] -> mask (turn: 0..3, clockwise)
+_FORK_ROTATED = tuple(tuple(_rotated_mask(m, t) for t in range(len(Direction)))
+                      for m in range(FORK_MASKS_COUNT))
+# [mask] -> tuple of directions (in Direction order)
+_FORK_DIRECTIONS = tuple(tuple(d for d in Direction if m & (1 << d.value))
+                         for m in range(FORK_MASKS_COUNT))
+# [mask] -> number of directions
+_FORK_COUNT = tuple(len(dirs) for dirs in _FORK_DIRECTIONS)
+# [mask] -> True if the fork is a straight line (DIR0-DIR180 or DIR90-DIR270)
+_FORK_IS_STRAIGHT = tuple(m in (0b0101, 0b1010) for m in range(FORK_MASKS_COUNT))
+# [direction value] -> direction value / its bit / the bit of the opposite direction
+_DIRECTION_VALUES = tuple(d.value for d in Direction)
+_DIRECTION_BITS = tuple(1 << d.value for d in Direction)
+_OPPOSITE_DIRECTION_BITS = tuple(1 << d.opposite.value for d in Direction)
+
+
 class Fork:
+    __slots__ = ("_mask",)
+
     def __init__(self, *directions: Direction | int):
-        self._fork = set()  # Rename to "_directions"?
-        # an alternative implementation of fork data could be
-        # self._fork = [False for _ in range(len(Directions))]
+        self._mask = 0  # see the fork tables above
         self.add(*directions)
 
     def __contains__(self, item: Direction) -> bool:
-        return item in self._fork
+        return bool(self._mask & (1 << item.value))
     
     def __iter__(self): # -> Iterator:
-        return self._fork.__iter__()
+        return iter(_FORK_DIRECTIONS[self._mask])
+
+    @property
+    def mask(self) -> int:
+        return self._mask
+
+    @mask.setter
+    def mask(self, value: int) -> None:
+        self._mask = value & FORK_FULL_MASK
+
+    @staticmethod
+    def from_mask(mask: int) -> Fork:
+        result = Fork()
+        result.mask = mask
+        return result
 
     def add(self, *directions: Direction | int) -> None:
         for dir in directions:
-            self._fork.add(Direction(dir))
+            self._mask |= 1 << Direction(dir).value
 
     def remove(self, *directions: Direction | int) -> None:
         for dir in directions:
-            self._fork.discard(Direction(dir))
+            self._mask &= ~(1 << Direction(dir).value)
 
     def clear(self) -> Fork:
-        self._fork.clear()
+        self._mask = 0
         return self
 
     def fill(self) -> None:
-        # self._fork = set(d for d in Direction) # Is it effective?
-        for d in Direction:
-            self._fork.add(d)
+        self._mask = FORK_FULL_MASK
 
     @property
     def count(self) -> int:
-        return len(self._fork)
+        return _FORK_COUNT[self._mask]
     
     def turned(self, dir: int) -> set:
-        result = set()
-        for f in self._fork:
-            result.add(f.turned(dir))
-        return result
+        return set(_FORK_DIRECTIONS[self.turned_mask(dir)])
+
+    def turned_mask(self, dir: int) -> int:
+        return _FORK_ROTATED[self._mask][int(dir) % len(Direction)]
     
     def turn(self, dir: int) -> None:
-        self._fork = self.turned(dir)  # Is it effective?
+        self._mask = _FORK_ROTATED[self._mask][int(dir) % len(Direction)]
     
     def turn_right(self) -> None:
         self.turn(1)
@@ -134,18 +182,37 @@ class Fork:
     
     @property
     def is_straight(self) -> bool:
-        #return self.count == 2 and self._fork[0] == self._fork[1].opposite
-        if self.count == 2:
-            first, second = self._fork # tuple(self._fork)
-            return first == second.opposite
+        return _FORK_IS_STRAIGHT[self._mask]
 
     @property
     def is_full(self) -> bool:
-        return self.count == len(Direction)
+        return self._mask == FORK_FULL_MASK
     
     @property
     def is_empty(self) -> bool:
-        return self.count == 0
+        return self._mask == 0
+
+
+class ForkView(Fork):
+    """ A fork which is stored in a Net's buffer (it doesn't own the data) """
+    __slots__ = ("_forks", "_index")
+
+    def __init__(self, forks: bytearray, index: int):
+        self._forks, self._index = forks, index
+
+    @property
+    def _mask(self) -> int:
+        return self._forks[self._index]
+
+    @_mask.setter
+    def _mask(self, value: int) -> None:
+        self._forks[self._index] = value
+
+    def __copy__(self) -> Fork:  # a copy is detached from the net
+        return Fork.from_mask(self._mask)
+
+    def __deepcopy__(self, memo: dict) -> Fork:
+        return Fork.from_mask(self._mask)
 
 
 @dataclass
@@ -163,23 +230,78 @@ class Cell:
         return item in self.fork
 
 
+class CellView:
+    """ A cell which is stored in a Net's buffers. It works like a Cell,
+        but it's just a (lightweight) reference to the net data """
+    __slots__ = ("_net", "_index")
+
+    def __init__(self, net: Net, index: int):
+        self._net, self._index = net, index
+
+    @property
+    def fork(self) -> ForkView:
+        return ForkView(self._net._forks, self._index)
+
+    @fork.setter
+    def fork(self, value: Fork) -> None:
+        self._net._forks[self._index] = value.mask
+        self._net.mark_dirty(self._index)
+        self._net._plugged_from = None  # like Net._set_cell()
+
+    @property
+    def is_plugged(self) -> bool:
+        return bool(self._net._plugged[self._index])
+
+    @is_plugged.setter
+    def is_plugged(self, value: bool) -> None:
+        net = self._net
+        net._plugged_count += bool(value) - net._plugged[self._index]
+        net._plugged[self._index] = bool(value)
+        net.mark_dirty(self._index)
+        net._plugged_from = None  # like Net._set_cell()
+
+    def setup(self, fork: Fork, is_plugged: bool) -> None:
+        self.fork, self.is_plugged = fork, is_plugged
+
+    def copy_from(self, other: Cell | CellView) -> None:
+        self.setup(other.fork, other.is_plugged)
+
+    def __contains__(self, item: Direction) -> bool:
+        return bool(self._net._forks[self._index] & (1 << item.value))
+
+
 class Net:
     MIN_WIDTH: int = 2
     MIN_HEIGHT: int = 2
-    MAX_WIDTH: int = 100
-    MAX_HEIGHT: int = 100
+    MAX_WIDTH: int = 500
+    MAX_HEIGHT: int = 500
     DEFAULT_WIDTH: int = 5
     DEFAULT_HEIGHT: int = 4
+    # update() uses the NumPy solver (if NumPy is installed) for nets of this area
+    # and bigger. For small nets the plain traversal is faster
+    NUMPY_MIN_AREA: int = 2500
 
     def __init__(self, width: int=DEFAULT_WIDTH, height: int=DEFAULT_HEIGHT,
-                 cell: Cell=Cell()):
-        # Cell() as a default parameter is safe here, because it's copied (deep)
-        self._cells = list()
+                 cell: Cell=Cell(), rng: Random | None=None):
+        # Cell() as a default parameter is safe here, because it's only read
+        # The net is stored in two flat buffers (row by row, index = y * width + x):
+        # fork masks (see Fork) and plugged flags, one byte per cell each
+        self._width, self._height = 0, 0
+        self._forks = bytearray()
+        self._plugged = bytearray()
+        self._plugged_count = 0
+        # (start index, go_through) of the last update(). If it's None,
+        # the plugged flags can't be updated incrementally (see update_turned())
+        self._plugged_from: tuple[int, bool] | None = None
+        # All random decisions (generate(), disassemble()) are made by this generator
+        self._rng = rng if rng is not None else Random()
+        # Indices of cells changed since the last pop_dirty() (None - all cells)
+        self._dirty: set[int] | None = None
         self.setup(width, height, cell)
 
     def setup(self, width: int, height: int, cell: Cell=Cell()) -> bool:
         """ It returns True if size was changed and False otherwise """
-        # Cell() as a default parameter is safe here, because it's copied (deep)
+        # Cell() as a default parameter is safe here, because it's only read
         width, height = self._fitted_size((width, height))
         if self.width == width and self.height == height:
             return False
@@ -187,57 +309,99 @@ class Net:
         return True
 
     def reset(self, fork: Fork=Fork(), is_plugged: bool=False) -> None:
-        # Fork() as a default parameter is safe here, because it's copied (deep)
-        self.for_each(lambda cell: cell.setup(deepcopy(fork), is_plugged))
+        # Fork() as a default parameter is safe here, because it's only read
+        self._forks[:] = bytes((fork.mask,)) * self.area
+        self._plugged[:] = bytes((bool(is_plugged),)) * self.area
+        self._plugged_count = self.area if is_plugged else 0
+        self._plugged_from = None
+        self._dirty = None
 
 
-    def generate(self, go_through: bool) -> bool:  # rename to create?
+    def generate(self, go_through: bool,
+        algorithm: MazeAlgorithm=MazeAlgorithm.DFS) -> bool:  # rename to create?
         """ It return True if the maze is united (and was successfully generated) """
+        randint = self._rng.randint
         start_pos = Point(randint(0, self.width-1), randint(0, self.height-1))
-        return self._traversal(start_pos, go_through, True) == self.area
+        if algorithm == MazeAlgorithm.DFS:
+            return self._traversal(start_pos, go_through, True) == self.area
+        self._forks[:] = bytes(self.area)
+        generate_maze(algorithm, self._forks, self.neighbours(go_through),
+            start_pos.y * self._width + start_pos.x, self._rng)
+        # Any spanning tree connects all cells
+        self._plug_all()
+        return True
 
     def update(self, start_pos: Point, go_through: bool) -> bool:
         """ It returns True if the net is united and False otherwise """
         return self._traversal(start_pos, go_through, False) == self.area # - skiped_cells_count
 
+    def update_turned(self, pos: Point, old_mask: int, start_pos: Point,
+        go_through: bool) -> bool:
+        """ It works like update(), but only for the case when one fork (at pos)
+            has been turned since the last update (old_mask - its previous mask).
+            It re-walks only the part of the net that is affected by the turn.
+            It returns True if the net is united and False otherwise """
+        start = start_pos.y * self._width + start_pos.x
+        if not self.does_pos_exist(pos) or self._plugged_from != (start, go_through):
+            return self.update(start_pos, go_through)
+        index = pos.y * self._width + pos.x
+        self.mark_dirty(index)
+        self._update_turned(index, old_mask, start, go_through)
+        return self._plugged_count == self.area
+
     def disassemble(self) -> tuple[int, int]:
         """ it returns a number of cells which could be turned (not empty or full) and
             a minimal number of steps (/clicks), that needed to assemble the net """
         turned_cells_count = 0
         back_steps_count = 0
 
-        for col in self._cells:
-            for cell in col:
-                #if not cell.fork.is_empty and not cell.fork.is_full:
-                if 0 < cell.fork.count < len(Direction):
-                    turned_cells_count += 1
-                    turn = randint(0, len(Direction)-1)
-                    cell.fork.turn(turn)
-                    back_steps_count += turn
-        
-                    # fix back_steps_count (in these cases it doesn't equal to forward turn)
-                    if turn == Direction.DIR270.value:
-                        back_steps_count -= 2
-                    elif turn == Direction.DIR180.value and cell.fork.is_straight:
-                        back_steps_count -= 2
-
+        randint = self._rng.randint
+        forks = self._forks
+        for i, mask in enumerate(forks):
+            #if not cell.fork.is_empty and not cell.fork.is_full:
+            if 0 < _FORK_COUNT[mask] < len(Direction):
+                turned_cells_count += 1
+                turn = randint(0, len(Direction)-1)
+                forks[i] = _FORK_ROTATED[mask][turn]
+                back_steps_count += turn
+    
+                # fix back_steps_count (in these cases it doesn't equal to forward turn)
+                if turn == Direction.DIR270.value:
+                    back_steps_count -= 2
+                elif turn == Direction.DIR180.value and _FORK_IS_STRAIGHT[mask]:
+                    back_steps_count -= 2
+
+        self._plugged_from = None
+        self._dirty = None
         return (turned_cells_count, back_steps_count)
 
     def disassemble2(self) -> None:
-        self.for_each(lambda cell: cell.fork.turn(randint(0, len(Direction)-1)))
+        randint = self._rng.randint
+        forks = self._forks
+        for i, mask in enumerate(forks):
+            forks[i] = _FORK_ROTATED[mask][randint(0, len(Direction)-1)]
+        self._plugged_from = None
+        self._dirty = None
+
+    @property
+    def rng(self) -> Random:
+        return self._rng
+
+    def seed(self, value: int | None) -> None:
+        """ It reseeds the net's random generator (None - from system entropy) """
+        self._rng.seed(value)
 
     @property
     def is_united(self) -> bool:
-        for col in self._cells:
-            for cell in col:
-                if not cell.is_plugged and not cell.fork.is_empty:
-                    return False
+        for mask, is_plugged in zip(self._forks, self._plugged):
+            if not is_plugged and mask != 0:
+                return False
         return True
 
 
     @property
     def width(self) -> int:
-        return len(self._cells)
+        return self._width
 
     @width.setter
     def width(self, value: int) -> None:
@@ -247,7 +411,7 @@ class Net:
 
     @property
     def height(self) -> int:
-        return len(self._cells[0]) if self.width > 0 else 0
+        return self._height
 
     @height.setter
     def height(self, value: int) -> None:
@@ -268,28 +432,61 @@ class Net:
     def area(self) -> int:
         return self.width * self.height
 
-    def __getitem__(self, key: Point) -> Cell:  # Do it for tuple (as key) too?
-        return self._cells[key.x][key.y] #[x][y]
+    def __getitem__(self, key: Point) -> CellView:  # Do it for tuple (as key) too?
+        return CellView(self, key.y * self._width + key.x)
 
     # Do we need this?
     def __setitem__(self, key: Point, value: Cell) -> None: # | tuple[int, int]
-        self._cells[key.x][key.y] = value
+        self._set_cell(key.y * self._width + key.x, value)
 
     # It's doubtful
-    def __call__(self, x: int, y: int) -> Cell:
+    def __call__(self, x: int, y: int) -> CellView:
         """ It works like an indexing [index], but for two coordinates,
             so it returns Cell(x, y). Note, that it DOESN'T do range checks! """
-        return self._cells[x][y]
+        return CellView(self, y * self._width + x)
 
-    def get_at(self, pos: Point) -> Cell | None:
+    def get_at(self, pos: Point) -> CellView | None:
         if self.does_pos_exist(pos):
-            return self._cells[pos.x][pos.y]
+            return self[pos]
         return None # raise IndexError()?
 
     def set_at(self, pos: Point, cell: Cell) -> None:
         if self.does_pos_exist(pos):
-            self._cells[pos.x][pos.y] = cell
+            self[pos] = cell
 
+    def neighbours(self, go_through: bool) -> tuple[tuple[int, int, int, int], ...]:
+        """ Neighbour table of the net (see neighbour_table()).
+            It's cached, so it's built only once per size and topology """
+        return neighbour_table(self._width, self._height, go_through)
+
+    @property
+    def forks(self) -> bytes:
+        """ Fork masks of all cells (row by row) """
+        return bytes(self._forks)
+
+    @forks.setter
+    def forks(self, value: bytes) -> None:
+        if len(value) != self.area:
+            raise ValueError(f"Wrong forks data length: {len(value)} (expected {self.area})")
+        self._forks[:] = value
+        self._plugged_from = None
+        self._dirty = None
+
+
+    def pop_dirty(self) -> set[int] | None:
+        """ It returns indices of cells, which forks or plugged flags could
+            have been changed since the last call (None - all cells). Changes
+            are tracked by the net methods (a fork, turned through a view,
+            is tracked by update_turned()) """
+        dirty, self._dirty = self._dirty, set()
+        return dirty
+
+    def mark_dirty(self, index: int | None=None) -> None:
+        """ index is None - all cells """
+        if index is None:
+            self._dirty = None
+        elif self._dirty is not None:
+            self._dirty.add(index)
 
     def does_pos_exist(self, pos: Point) -> bool:
         return self.does_pos_exist_xy(pos.x, pos.y)
@@ -298,9 +495,8 @@ class Net:
         return (0 <= x < self.width) and (0 <= y < self.height)
 
     def for_each(self, func, *args, **kwargs) -> None:
-        for col in self._cells:
-            for cell in col:
-                func(cell, *args, **kwargs)
+        for i in range(self.area):
+            func(CellView(self, i), *args, **kwargs)
 
     def for_each_index(self, func, *args, **kwargs) -> None:
         width = self.width
@@ -311,65 +507,242 @@ class Net:
 
 
     def _setup(self, width: int, height: int, cell: Cell=Cell()) -> None:
-        self._cells.clear()  # do we need this? Or this: del self._cells ?
-        # Well, I guess clear() could help for garbage collector, but I'm not sure
-        self._cells = [[deepcopy(cell)
-                        for _ in range(height)]
-                        for _ in range(width)] # is it effective?
+        # The whole net is allocated in one shot
+        area = width * height
+        self._width, self._height = width, height
+        self._forks = bytearray((cell.fork.mask,)) * area
+        self._plugged = bytearray((bool(cell.is_plugged),)) * area
+        self._plugged_count = area if cell.is_plugged else 0
+        self._dirty = None
+        self._plugged_from = None
+
+    def _set_cell(self, index: int, cell: Cell | CellView) -> None:
+        self._forks[index] = cell.fork.mask
+        self._plugged[index] = bool(cell.is_plugged)
+        self.mark_dirty(index)
+        self._plugged_from = None
 
     def _traversal(self, start_pos: Point, go_through: bool,
         creation_mode: bool=False) -> int: # cells_to_skip: list[Point]
         """ It returns a number of visited/plugged cells """
         if not self.does_pos_exist(start_pos):
             return 0 # -1?
-        
-        def has_connection(cur_pos: Point, next_pos: Point, dir: Direction) -> bool:
-            return (dir in self[cur_pos].fork) and (dir.opposite in self[next_pos].fork)
-
-        def get_next_pos(pos: Point, dir: Direction) -> Point:
-            np = next_pos(pos, dir)
-            if go_through and not self.does_pos_exist(np):
-                return Point(np.x % self.width, np.y % self.height)
-            return np
-        
+        start = start_pos.y * self._width + start_pos.x
+
+        if not creation_mode and np is not None and self.area >= self.NUMPY_MIN_AREA:
+            return self._update_numpy(start, go_through)
+
+        forks, plugged = self._forks, self._plugged
+        # neighbours[index][dir] - index of the neighbour or -1
+        neighbours = self.neighbours(go_through)
+
+        if creation_mode:
+            forks[:] = bytes(self.area)
+            generate_maze(MazeAlgorithm.DFS, forks, neighbours, start, self._rng)
+            self._plug_all()
+            return self.area
+
         # reset the net
-        self.for_each(lambda cell: cell.setup(
-            cell.fork.clear() if creation_mode else cell.fork, False))
+        plugged[:] = bytes(self.area)
+        self._dirty = None
 
-        pos = start_pos.clone() # deepcopy(start_pos)  # just in case
-        self[pos].is_plugged = True
+        # The loop works on cell indices only (there are no Points and lookups
+        # through views)
+        dirs = _DIRECTION_VALUES
+        bits = _DIRECTION_BITS
+        opposite_bits = _OPPOSITE_DIRECTION_BITS
+
+        pos = start
+        plugged[pos] = True
         plugged_count = 1
 
         path = list()
-        unvisited = list() # set?
         while True:
-            unvisited.clear()
-
-            for dir in Direction:
-                np = get_next_pos(pos, dir)
-                if self.does_pos_exist(np) and not self[np].is_plugged and (
-                    creation_mode or has_connection(pos, np, dir)):
-                    unvisited.append(dir)
-                    if not creation_mode:
-                        break
-
-            if len(unvisited) > 0:
-                dir = choice(unvisited)
-                if creation_mode:
-                    self[pos].fork.add(dir)
-                path.append(pos) # deepcopy isn't needed
-                pos = get_next_pos(pos, dir)
-                if creation_mode:
-                    self[pos].fork.add(dir.opposite)
-                self[pos].is_plugged = True
+            next_index = -1
+            cell_neighbours = neighbours[pos]
+            mask = forks[pos]
+            for dir in dirs:
+                n = cell_neighbours[dir]
+                if (n >= 0 and mask & bits[dir] and not plugged[n]
+                    and forks[n] & opposite_bits[dir]):
+                    next_index = n
+                    break
+
+            if next_index >= 0:
+                path.append(pos)
+                pos = next_index
+                plugged[pos] = True
                 plugged_count += 1
             else:
                 if len(path) == 0:
                     break
                 pos = path.pop()
         
+        self._plugged_count = plugged_count
+        self._plugged_from = (start, go_through)
         return plugged_count
 
+    def _plug_all(self) -> None:
+        self._plugged[:] = bytes((True,)) * self.area
+        self._plugged_count = self.area
+        self._plugged_from = None
+        self._dirty = None
+
+    def _update_numpy(self, start: int, go_through: bool) -> int:
+        """ It works like _traversal(creation_mode=False), but with whole-array
+            operations: it labels connected components of the net and plugs
+            the component of the start cell. It returns a number of plugged cells """
+        width, height = self._width, self._height
+        forks = np.frombuffer(self._forks, dtype=np.uint8).reshape(height, width)
+        # Connections to the right (DIR90 - DIR270) and down (DIR180 - DIR0)
+        right = ((forks & 0b0010) != 0) & ((np.roll(forks, -1, axis=1) & 0b1000) != 0)
+        down = ((forks & 0b0100) != 0) & ((np.roll(forks, -1, axis=0) & 0b0001) != 0)
+        if not go_through:
+            right[:, -1] = False
+            down[-1, :] = False
+        indices = np.arange(width * height).reshape(height, width)
+        u = np.concatenate((indices[right], indices[down]))
+        v = np.concatenate((np.roll(indices, -1, axis=1)[right],
+                            np.roll(indices, -1, axis=0)[down]))
+
+        # Label components: hook a bigger root to a smaller one for every
+        # connection between different components, then compress the paths
+        labels = np.arange(width * height)
+        while True:
+            lu, lv = labels[u], labels[v]
+            differ = lu != lv
+            if not differ.any():
+                break
+            lu, lv = lu[differ], lv[differ]
+            np.minimum.at(labels, np.maximum(lu, lv), np.minimum(lu, lv))
+            while True:
+                compressed = labels[labels]
+                if np.array_equal(compressed, labels):
+                    break
+                labels = compressed
+
+        plugged = labels == labels[start]
+        np.frombuffer(self._plugged, dtype=np.uint8)[:] = plugged
+        self._dirty = None
+        self._plugged_count = int(np.count_nonzero(plugged))
+        self._plugged_from = (start, go_through)
+        return self._plugged_count
+
+    def _update_turned(self, index: int, old_mask: int, start: int,
+        go_through: bool) -> None:
+        forks, plugged = self._forks, self._plugged
+        neighbours = self.neighbours(go_through)[index]
+        new_mask = forks[index]
+        lost, gained = old_mask & ~new_mask, new_mask & ~old_mask
+
+        def connected_dirs(mask: int) -> list[tuple[int, int]]:
+            """ (direction, neighbour) pairs, where the neighbour points back """
+            result = list()
+            for dir in _DIRECTION_VALUES:
+                j = neighbours[dir]
+                if mask & _DIRECTION_BITS[dir] and j >= 0 and (
+                    forks[j] & _OPPOSITE_DIRECTION_BITS[dir]):
+                    result.append((dir, j))
+            return result
+
+        if not plugged[index]:
+            # The cell (and all its old connections) wasn't plugged,
+            # so it could only be plugged now through a new connection
+            for _, j in connected_dirs(gained):
+                if plugged[j]:
+                    self._plug_from(index, go_through)
+                    break
+            return
+
+        # New connections could plug unplugged parts of the net
+        for _, j in connected_dirs(gained):
+            if not plugged[j]:
+                self._plug_from(j, go_through)
+
+        # Lost connections could cut parts of the net off. They are checked
+        # one by one, the connections, which aren't checked yet, are still there
+        lost_connections = connected_dirs(lost)
+        remaining = set(d for d, _ in lost_connections)
+        for d, j in lost_connections:
+            remaining.discard(d)
+            if plugged[index] and plugged[j]:
+                self._unplug_cut_off(index, j, remaining, start, go_through)
+
+    def _plug_from(self, index: int, go_through: bool) -> None:
+        """ It plugs all unplugged cells, which are connected to index (and index too) """
+        forks, plugged = self._forks, self._plugged
+        neighbours = self.neighbours(go_through)
+        dirty = self._dirty if self._dirty is not None else set()
+        plugged[index] = True
+        self._plugged_count += 1
+        dirty.add(index)
+        stack = [index]
+        while stack:
+            i = stack.pop()
+            mask = forks[i]
+            for dir, j in enumerate(neighbours[i]):
+                if (j >= 0 and mask & _DIRECTION_BITS[dir] and not plugged[j]
+                    and forks[j] & _OPPOSITE_DIRECTION_BITS[dir]):
+                    plugged[j] = True
+                    self._plugged_count += 1
+                    dirty.add(j)
+                    stack.append(j)
+
+    def _unplug_cut_off(self, a: int, b: int, extra: set[int], start: int,
+        go_through: bool) -> None:
+        """ The connection between plugged cells a and b has been lost.
+            It searches from a and b simultaneously (over plugged cells) until
+            the searches meet (nothing is cut off) or one of them is exhausted,
+            and then it unplugs the side which isn't connected to start.
+            extra - directions of a, which are still treated as connected.
+            It takes time proportional to the smaller side """
+        forks, plugged = self._forks, self._plugged
+        table = self.neighbours(go_through)
+
+        def neighbours(i: int):
+            for dir, j in enumerate(table[i]):
+                if j < 0 or not plugged[j]:
+                    continue
+                if (forks[i] & _DIRECTION_BITS[dir] and forks[j] & _OPPOSITE_DIRECTION_BITS[dir]
+                    or i == a and dir in extra
+                    or j == a and (dir + 2) % len(Direction) in extra):
+                    yield j
+
+        owner = {a: 0, b: 1}
+        stacks = ([a], [b])
+        while stacks[0] and stacks[1]:
+            for side in (0, 1):
+                if not stacks[side]:
+                    continue
+                for j in neighbours(stacks[side].pop()):
+                    side_j = owner.get(j)
+                    if side_j is None:
+                        owner[j] = side
+                        stacks[side].append(j)
+                    elif side_j != side:
+                        return  # a and b are still connected
+
+        dirty = self._dirty if self._dirty is not None else set()
+        exhausted = 0 if not stacks[0] else 1
+        if owner.get(start) == exhausted:
+            # The other side is cut off. It hasn't been fully visited yet
+            to_unplug = [(a, b)[1 - exhausted]]
+            plugged[to_unplug[0]] = False
+            self._plugged_count -= 1
+            dirty.add(to_unplug[0])
+            while to_unplug:
+                for j in neighbours(to_unplug.pop()):
+                    plugged[j] = False
+                    self._plugged_count -= 1
+                    dirty.add(j)
+                    to_unplug.append(j)
+        else:
+            for i, side in owner.items():
+                if side == exhausted:
+                    plugged[i] = False
+                    self._plugged_count -= 1
+                    dirty.add(i)
+
     def _fitted_width(self, width: int) -> int:
         return fit_into(width, self.MIN_WIDTH, self.MAX_WIDTH)
     
@@ -385,36 +758,74 @@ class Net:
 class LevelData:
     field_size: tuple[int, int] = (Net.DEFAULT_WIDTH, Net.DEFAULT_HEIGHT) 
     go_through: bool = False
+    maze_algorithm: MazeAlgorithm = MazeAlgorithm.DFS
+    seed: int | None = None  # None - a random board
+    unique: bool = False  # only boards with the only solution
 
 
 class Engine:
     SCORE_GO_THROUGH_COEFF = 4
     POINTS_PER_CELL = 10  # Amount of points per cell (if it isn't empty)
+    SEED_BITS = 32
+    MAX_UNIQUE_ATTEMPTS = 10  # number of nets to be generated to get a unique one
+    # Nets of this area and smaller are solved by new_game(), bigger ones
+    # are solved in the background (it takes up to ~25 s for 500x500)
+    SOLVER_MAX_AREA = 100 * 100
 
     def __init__(self, settings: LevelData=LevelData()):
         # We don't change settings, so it's safe to use LevelData()
         # as a default parameter
         w, h = settings.field_size
-        self._net = Net(w, h, Cell())
+        # A board depends only on the level settings and the seed. The engine
+        # has its own generators, so engines don't share any random state
+        self._rng = Random()
+        self._seeds = Random()  # it generates seeds for random boards
+        self._seed = 0
+        self._net = Net(w, h, Cell(), self._rng)
         self._go_through = settings.go_through
+        self._maze_algorithm = settings.maze_algorithm
+        self._unique = settings.unique
+        self._is_unique = False  # the current board has the only solution
 
         self._power_pos = Point((self._net.width-1) // 2, (self._net.height-1) // 2)
         
         self._is_net_united = False
         self._turned_cells_count = 0
         self._back_steps_count = 0
+        # The exact number of turns, which is found in the background (see new_game())
+        self._min_turns: Future | None = None
+        self._stop_solving: Event | None = None  # it stops the background solving
         self._moves_count = 0
+        self._hints: HintTracker | None = None  # forced orientations for hint()
+        # Domains for hints, which are found in the background (see _start_solving())
+        self._hint_domains: Future | None = None
 
-        self.new_game()
+        self.new_game(settings.seed)
 
-    def set_settings(self, field_size: tuple[int, int], go_through: bool) -> None:
+    def set_settings(self, field_size: tuple[int, int], go_through: bool,
+        maze_algorithm: MazeAlgorithm | None=None, seed: int | None=None,
+        unique: bool | None=None) -> None:
         field_size_changed = self._set_field_size(field_size, False)
         go_through_changed = self._set_go_through(go_through, False)
-        if field_size_changed or go_through_changed:        
-            self.new_game()
+        algorithm_changed = maze_algorithm is not None and (
+            self._set_maze_algorithm(maze_algorithm, False))
+        unique_changed = unique is not None and self._set_unique(unique, False)
+        seed_changed = seed is not None and seed != self._seed
+        if (field_size_changed or go_through_changed or algorithm_changed
+            or unique_changed or seed_changed):
+            self.new_game(seed)
 
     def set_level(self, level: LevelData) -> None:
-        self.set_settings(level.field_size, level.go_through)
+        self.set_settings(level.field_size, level.go_through, level.maze_algorithm,
+            level.seed, level.unique)
+
+    @property
+    def level(self) -> LevelData:
+        """ Settings of the current board (with its seed, so it can be regenerated).
+            unique is False if a board with the only solution hasn't been made
+            for the seed (the board is the same as without unique then) """
+        return LevelData(self.field_size, self._go_through, self._maze_algorithm,
+            self._seed, self._is_unique)
 
     @property
     def field_size(self) -> tuple[int, int]:
@@ -448,15 +859,94 @@ class Engine:
     def go_through(self, value: bool) -> None:
         self._set_go_through(value, True)
 
+    @property
+    def maze_algorithm(self) -> MazeAlgorithm:
+        return self._maze_algorithm
+
+    @maze_algorithm.setter
+    def maze_algorithm(self, value: MazeAlgorithm) -> None:
+        self._set_maze_algorithm(value, True)
 
-    def new_game(self) -> None:
-        self._is_net_united = self._net.generate(self._go_through)
+    @property
+    def unique(self) -> bool:
+        """ If it's True, only boards with the only solution are generated """
+        return self._unique
+
+    @unique.setter
+    def unique(self, value: bool) -> None:
+        self._set_unique(value, True)
+
+
+    def new_game(self, seed: int | None=None) -> None:
+        """ If seed is None, a new random seed is used """
+        self._stop_background()
+        self._seed = seed if seed is not None else self._seeds.getrandbits(self.SEED_BITS)
+        self._rng.seed(self._seed)
+        self._is_net_united = self._net.generate(self._go_through, self._maze_algorithm)
+        unique_solver = self._make_unique() if self._unique else None
+        self._is_unique = unique_solver is not None
         self._net_clone = deepcopy(self._net) # For debugging (temp)
         while self._is_net_united:  # this should be done only once in most cases (just in case)
             self._turned_cells_count, self._back_steps_count = self._net.disassemble()
             self._update_net()
+        # disassemble() only estimates the number of turns (other orientations
+        # could assemble the net too), so the exact minimum is used for scores.
+        # Bigger nets than SOLVER_MAX_AREA are solved in the background, so
+        # a new game doesn't take seconds (see back_steps_count)
+        if unique_solver is not None:
+            # The generated net is the only solution (a number of turns is
+            # the same in both ways), and domains don't depend on orientations
+            self._back_steps_count = unique_solver.turns_count(self._net.forks)
+            self._set_hints(unique_solver.domains)
+        elif self._net.area <= self.SOLVER_MAX_AREA:
+            solver = Solver(self._net.forks, self.neighbours)
+            solution = solver.solve(self.solved_forks)
+            if solution is not None:
+                self._back_steps_count = solution.turns_count
+            self._set_hints(solver.domains)
+        else:
+            self._start_solving(True)
         self._moves_count = 0
 
+    def load_game(self, level: LevelData, forks: bytes, solved_forks: bytes,
+        turned_cells_count: int, back_steps_count: int) -> None:
+        """ It starts a game on a ready board (e.g. a board from a level pack).
+            forks - disassembled fork masks, solved_forks - assembled ones """
+        self._set_field_size(level.field_size, False)
+        self._set_go_through(level.go_through, False)
+        self._set_maze_algorithm(level.maze_algorithm, False)
+        self._set_unique(level.unique, False)
+        self._is_unique = level.unique
+        self._seed = level.seed if level.seed is not None else 0
+        self._net.forks = solved_forks
+        self._net_clone = deepcopy(self._net) # For debugging (temp)
+        self._net.forks = forks
+        self._turned_cells_count = turned_cells_count
+        self._back_steps_count = back_steps_count
+        self._stop_background()
+        self._start_solving(False)
+        self._update_net()
+        self._moves_count = 0
+
+    def hint(self) -> tuple[Point, Direction] | None:
+        """ It returns a cell, which orientation is forced by the board
+            (by the shapes of the forks), but which is turned wrong now,
+            and the turn it needs (DIR90 - turn right, DIR270 - turn left,
+            DIR180 - two turns). It returns None if there is no such cell.
+            On big or loaded boards the first call could wait for the domains
+            (see _start_solving()) """
+        if self.is_net_united:
+            return None
+        if self._hints is None:
+            self._set_hints(self._hint_domains.result())
+        index = self._hints.hint()
+        if index is None:
+            return None
+        mask = self._net.forks[index]  # it's a copy, but it isn't often
+        forced_mask = self._hints.forced_mask(index)
+        turn = next(t for t in (1, 3, 2) if _FORK_ROTATED[mask][t] == forced_mask)
+        return Point(index % self._net.width, index // self._net.width), Direction(turn)
+
     @singledispatchmethod
     def turn_right(self, pos: Point) -> None:
         self._turn(pos, lambda p: self._net[p].fork.turn_right())
@@ -489,10 +979,45 @@ class Engine:
     def moves_count(self) -> int:  # It isn't used
         return self._moves_count
 
+    @property
+    def turned_cells_count(self) -> int:
+        """ Number of cells which were turned by disassembling """
+        return self._turned_cells_count
+
+    @property
+    def back_steps_count(self) -> int:
+        """ Number of turns (clicks), that are needed to assemble the net.
+            It waits for the solver, if a big net is being solved """
+        if self._min_turns is not None:
+            turns = self._min_turns.result()
+            if turns is not None:  # it should be
+                self._back_steps_count = turns
+            self._min_turns = None
+        return self._back_steps_count
+
+    @property
+    def solved_forks(self) -> bytes:
+        """ Fork masks of the assembled net (as it was generated) """
+        return self._net_clone.forks
+
+    @property
+    def power_pos(self) -> Point:
+        return self._power_pos.clone()
+
+    @property
+    def seed(self) -> int:
+        """ Seed of the current board """
+        return self._seed
+
     @property
     def field(self) -> Net:
         return self._net
 
+    @property
+    def neighbours(self) -> tuple[tuple[int, int, int, int], ...]:
+        """ Neighbour table of the field for the current topology (see neighbour_table()) """
+        return self._net.neighbours(self._go_through)
+
 
     def _set_field_size(self, value: tuple[int, int], start_new_game: bool) -> bool:
         """ It returns True if size was changed and False otherwise """
@@ -513,12 +1038,84 @@ class Engine:
             self.new_game()
         return True
 
+    def _set_maze_algorithm(self, value: MazeAlgorithm, start_new_game: bool) -> bool:
+        """ It returns True if the algorithm was changed and False otherwise """
+        if self._maze_algorithm == value:
+            return False
+        self._maze_algorithm = value
+        if start_new_game:
+            self.new_game()
+        return True
+
+    def _set_unique(self, value: bool, start_new_game: bool) -> bool:
+        """ It returns True if unique was changed and False otherwise """
+        if self._unique == value:
+            return False
+        self._unique = value
+        if start_new_game:
+            self.new_game()
+        return True
+
+    def _make_unique(self) -> Solver | None:
+        """ It changes the generated net until it has the only solution (new
+            nets are generated if it fails). The same random generator is used,
+            so the result depends only on the seed. It returns the solver of
+            the net (see make_unique()) or None if it has failed (e.g. there are
+            no unique boards of the size), the generated net is restored then """
+        if self._go_through and min(self.field_size) == 2:
+            # Every solution has a mirror one (the two neighbours are the same cell)
+            return None
+        for _ in range(self.MAX_UNIQUE_ATTEMPTS):
+            forks = bytearray(self._net.forks)
+            solver = make_unique(forks, self.neighbours, self._rng)
+            if solver is not None:
+                self._net.forks = forks
+                self._update_net()
+                return solver
+            self._net.generate(self._go_through, self._maze_algorithm)
+        # The same board as without unique (see level)
+        self._rng.seed(self._seed)
+        self._is_net_united = self._net.generate(self._go_through, self._maze_algorithm)
+        return None
+
     def _turn(self, pos: Point, turn_func) -> None:  # It could be a decorator (?)
         if not self._net.does_pos_exist(pos) or self.is_net_united:
             return
+        old_mask = self._net[pos].fork.mask
         turn_func(pos)
         self._moves_count += 1
-        self._update_net()
+        if self._hints is not None:
+            self._hints.update(pos.y * self._net.width + pos.x, self._net[pos].fork.mask)
+        self._is_net_united = self._net.update_turned(
+            pos, old_mask, self._power_pos, self._go_through)
+
+    def _set_hints(self, domains: list[int] | None) -> None:
+        if domains is None:  # it shouldn't be
+            domains = [1 << mask for mask in self.solved_forks]
+        self._hints = HintTracker(domains, self._net.forks)
+        self._hint_domains = None
+
+    def _stop_background(self) -> None:
+        """ It stops the solving of the previous board (if it's in progress) """
+        if self._stop_solving is not None:
+            self._stop_solving.set()
+            self._stop_solving = None
+        self._min_turns = None
+
+    def _start_solving(self, find_min_turns: bool) -> None:
+        """ It finds domains for hints and then (if find_min_turns) the minimal
+            number of turns in a daemon thread (see _solve()). The hint tracker
+            is made on the first hint() call with the orientations of that moment.
+            Only propagation is used for hints (a whole Solver() of a 500x500
+            net takes about 5 s, this one takes about 1 s, but fewer cells
+            are forced) """
+        self._hints = None
+        self._hint_domains = Future()
+        self._min_turns = Future() if find_min_turns else None
+        self._stop_solving = Event()
+        Thread(target=_solve, daemon=True, args=(self._net.forks, self.neighbours,
+            self.solved_forks, self._stop_solving, self._hint_domains,
+            self._min_turns)).start()
 
     def _update_net(self) -> bool:
         """ It returns True if the net is united and False otherwise """
@@ -528,7 +1125,7 @@ class Engine:
     def _calc_score(self) -> int:
         k = self.SCORE_GO_THROUGH_COEFF if self._go_through else 1
         return self._turned_cells_count * self.POINTS_PER_CELL * k + (
-            self._back_steps_count)
+            self.back_steps_count)
 
 
 
@@ -541,6 +1138,49 @@ DEFAULT_LEVELS = (
 
 """ functions """
 
+# A table of the biggest net takes ~30 MB, so only the current size is kept
+# (with and without go through)
+@lru_cache(maxsize=2)
+def neighbour_table(width: int, height: int,
+    go_through: bool) -> tuple[tuple[int, int, int, int], ...]:
+    """ It returns a table: [cell index][direction value] -> index of the
+        neighbour cell or -1 if there is no neighbour (cell index = y * width + x).
+        Tables are cached and shared (by nets, engines, solvers),
+        so they must not be changed """
+    indices = list(range(width * height))  # every index is stored once (it saves memory)
+    table = list()
+    for y in range(height):
+        for x in range(width):
+            neighbours = list()
+            for dx, dy in ((0, -1), (1, 0), (0, 1), (-1, 0)):  # in Direction order
+                nx, ny = x + dx, y + dy
+                if go_through:
+                    nx, ny = nx % width, ny % height
+                elif not (0 <= nx < width and 0 <= ny < height):
+                    neighbours.append(-1)
+                    continue
+                neighbours.append(indices[ny * width + nx])
+            table.append(tuple(neighbours))
+    return tuple(table)
+
+def _solve(forks: bytes, neighbours: tuple[tuple[int, int, int, int], ...],
+    solved_forks: bytes, stop: Event, domains: Future, turns: Future | None) -> None:
+    """ It's run by Engine._start_solving() in a daemon thread (so an exit
+        doesn't wait for it). One thread does both, so a stale solving (it's
+        stopped by stop) doesn't compete with two threads for the GIL """
+    _set_result(domains, lambda: Solver(forks, neighbours, probe=False).domains)
+    if turns is not None and not stop.is_set():
+        _set_result(turns, lambda: min_turns(forks, neighbours, solved_forks,
+            Solver.DEFAULT_NODES_LIMIT, stop))
+
+def _set_result(future: Future, func) -> None:
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        future.set_result(func())
+    except BaseException as e:
+        future.set_exception(e)
+
 def next_pos(pos: Point, dir: Direction) -> Point:
     match dir:
         case Direction.DIR0:
@@ -6,14 +6,24 @@ https://github.com/vitsmirnov
 """
 
 import pygame as pg
+try:  # It's an experimental part of pygame (see TextureRenderer)
+    from pygame._sdl2.video import Renderer, Texture, Window
+except ImportError:
+    Renderer = Texture = Window = None
 
+import os
 from dataclasses import dataclass
-from copy import deepcopy
+from copy import copy
 from math import ceil
 from functools import wraps
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
 
 from vs_pg_msg import *  # It's ok, there are no conflicts
 from lights_core import *  # It's ok, there are no conflicts
+from lights_profiler import Profiler
 from settings_instance import SETTINGS_INSTANCE
 
 
@@ -23,6 +33,8 @@ DEBUG_MODE: bool = True
 # classes list
 class UserInput: ...
 class Sprites: ...
+class SpriteAtlas: ...
+class TextureRenderer: ...
 class GameSettings: ...
 class LightsGame: ...
 
@@ -113,6 +125,209 @@ class Sprites:
         self.power = get_surface(self.POWER_POS)
         self.cursor = get_surface(self.CURSOR_POS)
 
+        self._transparent_color = transparent_color
+        # (fork mask, is_plugged, is_power) -> a cell image with all of them
+        # (a house is drawn if the fork has one arm and it isn't the power)
+        self._tiles: dict[tuple[int, bool, bool], pg.Surface] = dict()
+
+    def get_tile(self, mask: int, is_plugged: bool, is_power: bool) -> pg.Surface:
+        """ It returns a cell image (forks, house or power) composed once
+            (so a cell is drawn by one blit) """
+        key = (mask, is_plugged, is_power)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._tiles[key] = self._compose_tile(mask, is_plugged, is_power)
+        return tile
+
+    @property
+    def size(self) -> Size:
+        return self.power.get_size()
+
+    def scaled(self, size: Size, smooth: bool=False) -> Sprites:
+        """ It returns a copy of the sprites scaled to size (it could be called
+            from another thread). smooth - use smoothscale (see with_alpha()) """
+        scale = pg.transform.smoothscale if smooth else pg.transform.scale
+        result = copy(self)
+        result.forks = [[scale(sprite, size) for sprite in sprites] for sprites in self.forks]
+        result.houses = [scale(sprite, size) for sprite in self.houses]
+        result.power = scale(self.power, size)
+        result.cursor = scale(self.cursor, size)
+        result._tiles = dict()
+        return result
+
+    def with_alpha(self) -> Sprites:
+        """ It returns a copy of the sprites with per-pixel alpha instead of
+            the colorkey (smoothscale would blend the colorkey into the edges) """
+        result = copy(self)
+        result.forks = [[sprite.convert_alpha() for sprite in sprites] for sprites in self.forks]
+        result.houses = [sprite.convert_alpha() for sprite in self.houses]
+        result.power = self.power.convert_alpha()
+        result.cursor = self.cursor.convert_alpha()
+        result._tiles = dict()
+        return result
+
+    def _compose_tile(self, mask: int, is_plugged: bool, is_power: bool) -> pg.Surface:
+        fork = Fork.from_mask(mask)
+        if self.power.get_flags() & pg.SRCALPHA:  # see with_alpha()
+            result = pg.Surface(self.size, pg.SRCALPHA).convert_alpha()
+            result.fill((0, 0, 0, 0))
+        else:
+            result = pg.Surface(self.size).convert()
+            result.fill(self._transparent_color)
+            result.set_colorkey(self._transparent_color)
+        for dir in fork:
+            result.blit(self.forks[dir.value][is_plugged], (0, 0))
+        if is_power:
+            result.blit(self.power, (0, 0))
+        elif fork.count == 1:
+            result.blit(self.houses[is_plugged], (0, 0))
+        return result
+
+
+class SpriteAtlas:
+    """ It loads the sprite sheet once and keeps the sprites scaled to a few
+        recently used cell sizes (LRU), so zooming back and forth doesn't
+        rescale them. Sprites could be scaled in advance in a background
+        thread (see prefetch()) """
+    DEFAULT_CACHE_SIZE = 8  # number of scaled variants (besides the source)
+
+    def __init__(self, file_name: str, cell_width: int, cell_height: int,
+        transparent_color: pg.Color=COLOR_FUCHSIA, separator_width: int=0,
+        cursor_alpha: int=255, smooth: bool=False, cache_size: int=DEFAULT_CACHE_SIZE):
+        # smooth - scale with smoothscale (sprites get per-pixel alpha then)
+        self._source = Sprites(file_name, cell_width, cell_height,
+            transparent_color, separator_width)
+        self._scaling_source = self._source.with_alpha() if smooth else self._source
+        self._smooth = smooth
+        self._cursor_alpha = cursor_alpha
+        self._source.cursor.set_alpha(cursor_alpha)
+        self._cache: OrderedDict[Size, Sprites] = OrderedDict()
+        self._cache_size = cache_size
+        self._pending: dict[Size, Future] = dict()  # sizes, which are being scaled
+        self._executor: ThreadPoolExecutor | None = None  # it's created on demand
+
+    def get(self, size: Size) -> Sprites:
+        """ It returns the sprites of size (they are scaled now if they
+            aren't ready and aren't being scaled in the background) """
+        if size == self._source.size:
+            return self._source
+        sprites = self._cache.get(size)
+        if sprites is not None:
+            self._cache.move_to_end(size)
+            return sprites
+        future = self._pending.pop(size, None)
+        sprites = future.result() if future is not None else self._scale(size)
+        sprites.cursor.set_alpha(self._cursor_alpha)
+        self._cache[size] = sprites
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return sprites
+
+    def prefetch(self, sizes) -> None:
+        """ It starts scaling the sprites to sizes in a background thread """
+        for size in sizes:
+            if (size[0] <= 0 or size[1] <= 0 or size == self._source.size
+                or size in self._cache or size in self._pending):
+                continue
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(1)
+            self._pending[size] = self._executor.submit(self._scale, size)
+
+    @property
+    def source(self) -> Sprites:
+        """ The sprites of the sheet size (not scaled) """
+        return self._source
+
+    @property
+    def cursor_alpha(self) -> int:
+        return self._cursor_alpha
+
+    @cursor_alpha.setter
+    def cursor_alpha(self, value: int) -> None:
+        self._cursor_alpha = value
+        self._source.cursor.set_alpha(value)
+        for sprites in self._cache.values():
+            sprites.cursor.set_alpha(value)
+
+    def close(self) -> None:
+        """ It stops the background scaling (it should be called before pg.quit()) """
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self._pending.clear()
+
+    def _scale(self, size: Size) -> Sprites:
+        return self._scaling_source.scaled(size, self._smooth)
+
+
+class TextureRenderer:
+    """ It draws the game with an SDL renderer (pygame._sdl2.video) instead of
+        blitting surfaces: sprites (tiles) and the background are uploaded once
+        as textures, and the renderer scales tiles to the cell size (so zooming
+        doesn't scale sprites). It has its own window. It works with the software
+        renderer too (e.g. with the dummy video driver) """
+    def __init__(self, title: str, size: Size, smooth: bool=False):
+        # smooth - linear scaling (SDL reads the hint, when a texture is created)
+        if smooth:
+            os.environ.setdefault("SDL_RENDER_SCALE_QUALITY", "linear")
+        self._window = Window(title, size)
+        self._renderer = Renderer(self._window)
+        self._sprites: Sprites | None = None
+        # (fork mask, is_plugged, is_power) -> texture (see Sprites.get_tile())
+        self._tiles: dict[tuple[int, bool, bool], Texture] = dict()
+        self._cursor: Texture | None = None
+        self._background: Texture | None = None
+        self._background_source: pg.Surface | None = None
+
+    @property
+    def size(self) -> Size:
+        return self._window.size
+
+    @size.setter
+    def size(self, value: Size) -> None:
+        self._window.size = value
+
+    def set_caption(self, caption: str) -> None:
+        self._window.title = caption
+
+    def set_icon(self, icon: pg.Surface) -> None:
+        self._window.set_icon(icon)
+
+    def set_sprites(self, sprites: Sprites) -> None:
+        """ sprites - of any size (they are scaled while drawing) """
+        self._sprites = sprites
+        self._tiles.clear()
+        self._cursor = Texture.from_surface(self._renderer, sprites.cursor)
+
+    def draw_background(self, background: pg.Surface, rect: pg.Rect) -> None:
+        """ It draws the rect of background (it's uploaded once) at the same rect """
+        if background is not self._background_source:
+            self._background_source = background
+            self._background = Texture.from_surface(self._renderer, background)
+        self._background.draw(rect, rect)
+
+    def draw_tile(self, mask: int, is_plugged: bool, is_power: bool, rect: pg.Rect) -> None:
+        key = (mask, is_plugged, is_power)
+        tile = self._tiles.get(key)
+        if tile is None:
+            tile = self._tiles[key] = Texture.from_surface(self._renderer,
+                self._sprites.get_tile(mask, is_plugged, is_power))
+        tile.draw(None, rect)
+
+    def draw_cursor(self, rect: pg.Rect, alpha: int) -> None:
+        self._cursor.alpha = alpha
+        self._cursor.draw(None, rect)
+
+    def draw_surface(self, surface: pg.Surface, rect: pg.Rect) -> None:
+        """ It draws a surface, which isn't cached (e.g. a message) """
+        Texture.from_surface(self._renderer, surface).draw(None, rect)
+
+    def present(self) -> None:
+        self._renderer.present()
+
+    def close(self) -> None:
+        self._window.destroy()
+
 
 @dataclass
 class GameSettings:  # class for default game settings. (Rename?) (AppSettings?)
@@ -135,6 +350,15 @@ class GameSettings:  # class for default game settings. (Rename?) (AppSettings?)
     message_frame_width: int = 1
     message_vert_indent: int = 10
     message_hor_indent: int = 10
+    # The game loop sleeps until an event, instead of redrawing at a fixed FPS
+    event_driven_loop: bool = False
+    # Sprites are scaled (zoomed) with smoothscale
+    smooth_sprites: bool = False
+    # The game is drawn by an SDL renderer with textures (see TextureRenderer)
+    texture_renderer: bool = False
+    # Timings are recorded from the start and written to this file as they come
+    # (*.json or CSV otherwise, "" - timings are recorded only with the overlay)
+    profiler_dump_file: str = ""
 
     # level settings(?): field size, go through
     # controls?
@@ -174,6 +398,17 @@ class GameSettings:  # class for default game settings. (Rename?) (AppSettings?)
                 result.message_vert_indent = readint()  # *
                 result.message_hor_indent = readint()  # *
                 # * - these could be invalid and they should be checked for range!
+                # Optional settings (older files don't have them)
+                line = readline()
+                if line:
+                    result.event_driven_loop = bool(int(line))
+                line = readline()
+                if line:
+                    result.smooth_sprites = bool(int(line))
+                line = readline()
+                if line:
+                    result.texture_renderer = bool(int(line))
+                result.profiler_dump_file = readline()
         except:
             #print(f"Error: GameSettings.load_from_file({file_name}) failed.")
             return None
@@ -190,6 +425,15 @@ class LightsGame:
     ICON_SIDE_LENGTH = 16
     CURSOR_ALPHA_STEP = 10
     CELL_SCALE_STEP = 2
+    FPS = 60
+    IDLE_WAIT_TIMEOUT = 1000  # ms, the event-driven loop wakes up at least this often
+    # The window isn't bigger than this part of the desktop, bigger fields are
+    # scrolled (see _set_view())
+    MAX_SCREEN_SIZE_RATIO = 0.9
+    DEFAULT_DESKTOP_SIZE = (1024, 768)
+    SCROLL_WHEEL_CELLS = 3  # cells per a mouse wheel step
+    PROFILER_OVERLAY_PERIOD = 500  # ms, how often the timings overlay is updated
+    PROFILER_FONT_SIZE = 20
 
     MSG_WELCOME = (
         "Hello!",
@@ -212,7 +456,11 @@ class LightsGame:
         # " - + / - window size - + / - / ctrl+mouse wheel",
         # " - move window to center - home",
         " - show/hide cursor - del",
+        " - scroll - arrows / mouse wheel (+shift)",
+        " - zoom - 0 / 9 / ctrl+mouse wheel",
+        " - scroll to the power - home",
         " - info/about - F1",
+        " - timings - F3",
         "",
         "About:",
         "   (c) Vitaly Smirnov. 2024", # [VSdev]
@@ -221,6 +469,8 @@ class LightsGame:
 
     ERROR_MSG_CANT_LOAD_BACKGROUND = (
         "Error: can't load background image from: \"{}\". File not found.")
+    ERROR_MSG_CANT_CREATE_RENDERER = (
+        "Error: can't create the texture renderer ({}). Surfaces are used instead.")
     ERROR_MSG_CANT_LOAD_ICON = (
         "Error: can't load icon image from: \"{}\". File not found.")
 
@@ -231,36 +481,106 @@ class LightsGame:
         pg.init()  # pygame setup
 
         self._engine = Engine(level_settings)
+        # Only changed cells are redrawn (see _update_screen()), unless
+        # the whole screen is invalid (e.g. a message has been shown over it)
+        self._is_screen_invalid = True
+        self._cursor_cell: tuple[int, int] | None = None  # where it's drawn now
+        self._caption = ""
+        # The visible part of the field (the field pixel at the top left corner)
+        self._view_x, self._view_y = 0, 0
+        self._screen: pg.Surface | None = None
+        self._renderer: TextureRenderer | None = None  # None - surfaces are blitted
+        # (tile, pos) of every visible cell row by row, the net is drawn by one
+        # blits() call (see _update_net_blits())
+        self._net_blits: list[tuple[pg.Surface, tuple[int, int]]] = list()
+        self._net_blits_key: tuple | None = None  # what the sequence is built for
+        # Timings of frames (see switch_profiler_overlay())
+        self._profiler: Profiler | None = None
+        self._profiler_image: pg.Surface | None = None  # None - the overlay is hidden
+        self._profiler_image_time = 0
+        # Backgrounds of screen sizes (see _get_background())
+        self._tiled_background: pg.Surface | None = None
+        self._backgrounds: dict[tuple[int, int], pg.Surface] = {}
+        # Messages are shown over the game without stopping it (see _open_message()),
+        # data of a message is its commands
+        self._overlay = Overlay()
+        self._overlay_rect: pg.Rect | None = None  # where messages are drawn now
         self._init_controls()
         settings = self._init_settings()
         self._init_screen(settings.background_file_name)  # background is initialized here
         # Crucial init here. If we can't load sprites, then we can't run the game
         self._init_sprites(settings.sprites_file_name,
             settings.sprites_transparent_color, settings.sprites_separator_width,
-            settings.cursor_alpha)
+            settings.cursor_alpha, settings.smooth_sprites)
         self._init_icons(settings.icon_file_name, settings.icon_transparent_color)
         self._set_icon()
         self._init_messages(self._message_font_size, self._message_frame_width,
             self._message_vert_indent, self._message_hor_indent)
         self._clock = pg.time.Clock()
+        if self._profiler_dump_file:
+            self._start_profiler(self._profiler_dump_file)
 
     def run(self) -> None:
-        self._update_screen()
-        self._show_welcome_message()
-        self._run_game_loop()
-        pg.quit()
+        try:
+            self._update_screen()
+            self._show_welcome_message()
+            if self._event_driven_loop:
+                self._run_event_loop()
+            else:
+                self._run_game_loop()
+        finally:  # e.g. the profiler's dump file is finished even after an error
+            self._atlas.close()
+            if self._renderer is not None:
+                self._renderer.close()
+            if self._profiler is not None:
+                self._profiler.close()
+            pg.quit()
 
     def quit(self) -> None:
-        if self._quit_msg.show().key != pg.K_ESCAPE:
-            pg.event.post(pg.event.Event(pg.USEREVENT, {"code": 0})) #pg.event.Event(pg.QUIT))
+        self._open_message(self._quit_msg, {pg.K_ESCAPE: self._close_message,
+            pg.K_RETURN: self._post_quit_event, pg.K_SPACE: self._post_quit_event})
     
     def turn_fork_left(self, pos: tuple[int, int]) -> None:
-        x, y = pos #pg.mouse.get_pos()
-        self._engine.turn_left((x // self._cell_width, y // self._cell_height))
+        self._engine.turn_left(self._get_cell_at(pos))
     
     def turn_fork_right(self, pos: tuple[int, int]) -> None:
-        x, y = pos #pg.mouse.get_pos()
-        self._engine.turn_right((x // self._cell_width, y // self._cell_height))
+        self._engine.turn_right(self._get_cell_at(pos))
+
+    def scroll(self, dx: int, dy: int) -> None:
+        """ dx, dy - in pixels """
+        self._set_view(self._view_x + dx, self._view_y + dy)
+
+    def scroll_left(self) -> None:
+        self.scroll(-self.screen_size[0] // 2, 0)
+
+    def scroll_right(self) -> None:
+        self.scroll(self.screen_size[0] // 2, 0)
+
+    def scroll_up(self) -> None:
+        self.scroll(0, -self.screen_size[1] // 2)
+
+    def scroll_down(self) -> None:
+        self.scroll(0, self.screen_size[1] // 2)
+
+    def scroll_to_power(self) -> None:
+        power_pos = self._engine.power_pos
+        width, height = self.screen_size
+        self._set_view((power_pos.x * 2 + 1) * self._cell_width // 2 - width // 2,
+                       (power_pos.y * 2 + 1) * self._cell_height // 2 - height // 2)
+
+    def on_mouse_wheel(self, wheel: tuple[int, int]) -> None:
+        """ It scrolls (horizontally with shift) or zooms (with ctrl) """
+        x, y = wheel
+        mods = pg.key.get_mods()
+        if mods & pg.KMOD_CTRL:
+            if y != 0:
+                self._scale_field(self.CELL_SCALE_STEP * (1 if y > 0 else -1),
+                    pg.mouse.get_pos())
+            return
+        if mods & pg.KMOD_SHIFT:
+            x, y = -y, x
+        step = self.SCROLL_WHEEL_CELLS
+        self.scroll(x * step * self._cell_width, -y * step * self._cell_height)
 
     @staticmethod
     def _screen_size_updater(func):# -> function:
@@ -306,17 +626,31 @@ class LightsGame:
         self._show_cursor = not self._show_cursor
     
     def show_info(self) -> None:
-        self._info_msg.show()
+        self._open_message(self._info_msg, dict.fromkeys(
+            (pg.K_ESCAPE, pg.K_RETURN, pg.K_SPACE), self._close_message))
+
+    def switch_profiler_overlay(self) -> None:
+        """ It shows/hides timings of frame stages and engine calls
+            (the recording starts when it's shown first time) """
+        if self._profiler is None:
+            self._start_profiler()
+        if self._profiler_image is None:
+            self._update_profiler_image(force=True)
+        else:
+            self._profiler_image = None
+        self._invalidate_screen()
 
     def inc_cursor_alpha(self) -> None:
-        cur_alpha = self._sprites.cursor.get_alpha()
-        if cur_alpha is not None and cur_alpha + self.CURSOR_ALPHA_STEP <= 255:  # it isn't magic number)
-            self._sprites.cursor.set_alpha(cur_alpha + self.CURSOR_ALPHA_STEP)
+        cur_alpha = self._atlas.cursor_alpha
+        if cur_alpha + self.CURSOR_ALPHA_STEP <= 255:  # it isn't magic number)
+            self._atlas.cursor_alpha = cur_alpha + self.CURSOR_ALPHA_STEP
+            self._invalidate_screen()
     
     def dec_cursor_alpha(self) -> None:
-        cur_alpha = self._sprites.cursor.get_alpha()
-        if cur_alpha is not None and cur_alpha - self.CURSOR_ALPHA_STEP >= 0:
-            self._sprites.cursor.set_alpha(cur_alpha - self.CURSOR_ALPHA_STEP)
+        cur_alpha = self._atlas.cursor_alpha
+        if cur_alpha - self.CURSOR_ALPHA_STEP >= 0:
+            self._atlas.cursor_alpha = cur_alpha - self.CURSOR_ALPHA_STEP
+            self._invalidate_screen()
 
     def get_settings_instance(self) -> bool:
         """ It (will) create a file with settings example
@@ -340,7 +674,16 @@ class LightsGame:
 
     # For debugging (temp)
     def _finish_game(self):
-        self._engine._net = deepcopy(self._engine._net_clone)
+        # The forks are copied into the engine's net (it keeps the engine's
+        # random generator), and the hints follow them like turns
+        engine = self._engine
+        forks, solved_forks = engine.field.forks, engine.solved_forks
+        engine.field.forks = solved_forks
+        if engine._hints is not None:
+            for i, (mask, solved_mask) in enumerate(zip(forks, solved_forks)):
+                if mask != solved_mask:
+                    engine._hints.update(i, solved_mask)
+        engine.field.mark_dirty()
         #self._engine._update_net()
 
     # For debugging (temp)
@@ -350,6 +693,12 @@ class LightsGame:
 
     @property
     def screen_size(self) -> tuple[int, int]:
+        field_width, field_height = self.field_pixel_size
+        max_width, max_height = self._max_screen_size
+        return (min(field_width, max_width), min(field_height, max_height))
+
+    @property
+    def field_pixel_size(self) -> tuple[int, int]:
         return (self._engine.field_width * self._cell_width,
                 self._engine.field_height * self._cell_height)
 
@@ -378,9 +727,16 @@ class LightsGame:
         set_keydown_command(pg.K_INSERT, self.switch_go_through)
         set_keydown_command(pg.K_DELETE, self.switch_cursor)
         set_keydown_command(pg.K_F1, self.show_info)
+        set_keydown_command(pg.K_F3, self.switch_profiler_overlay)
         set_keydown_command(pg.K_KP_PLUS, self.inc_cursor_alpha)
         set_keydown_command(pg.K_KP_MINUS, self.dec_cursor_alpha)
         set_keydown_command(pg.K_h, self.get_settings_instance)
+        set_keydown_command(pg.K_LEFT, self.scroll_left)
+        set_keydown_command(pg.K_RIGHT, self.scroll_right)
+        set_keydown_command(pg.K_UP, self.scroll_up)
+        set_keydown_command(pg.K_DOWN, self.scroll_down)
+        set_keydown_command(pg.K_HOME, self.scroll_to_power)
+        set_command(pg.MOUSEWHEEL, 0, self.on_mouse_wheel)
         # Experimental
         set_keydown_command(pg.K_0, self.inc_cell_size)
         set_keydown_command(pg.K_9, self.dec_cell_size)
@@ -397,6 +753,10 @@ class LightsGame:
         # It's not good
         self._cell_width, self._cell_height = settings.cell_size
         self._show_cursor = settings.show_cursor
+        self._event_driven_loop = settings.event_driven_loop
+        self._use_texture_renderer = settings.texture_renderer
+        self._smooth_sprites = settings.smooth_sprites
+        self._profiler_dump_file = settings.profiler_dump_file
         self._message_text_color = settings.message_text_color
         self._message_background_color = settings.message_background_color
         self._message_frame_color = settings.message_frame_color
@@ -418,24 +778,42 @@ class LightsGame:
             print(self.ERROR_MSG_CANT_LOAD_BACKGROUND.format(file_name))
             self._background_image = pg.surface.Surface(
                 (self._cell_width, self._cell_height))
+        try:
+            desktop_width, desktop_height = pg.display.get_desktop_sizes()[0]
+        except (pg.error, IndexError):
+            desktop_width, desktop_height = self.DEFAULT_DESKTOP_SIZE
+        self._max_screen_size = (int(desktop_width * self.MAX_SCREEN_SIZE_RATIO),
+                                 int(desktop_height * self.MAX_SCREEN_SIZE_RATIO))
+        if self._use_texture_renderer:
+            self._init_renderer()
         self._update_screen_size()
         self._background_image = self._background_image.convert()
         pg.display.set_caption(self.DEFAULT_WINDOW_CAPTION)
 
+    def _init_renderer(self) -> None:
+        # If we can't create the renderer, we still can run the game with surfaces
+        if Renderer is None:
+            print(self.ERROR_MSG_CANT_CREATE_RENDERER.format("no pygame._sdl2"))
+            return
+        try:
+            self._renderer = TextureRenderer(self.DEFAULT_WINDOW_CAPTION,
+                self.screen_size, self._smooth_sprites)
+        except RuntimeError as error:  # pygame errors are RuntimeError
+            print(self.ERROR_MSG_CANT_CREATE_RENDERER.format(error))
+
     def _init_sprites(self, file_name: str, transparent_color: Color,
-        separator_width: int, cursor_alpha: int) -> None:
+        separator_width: int, cursor_alpha: int, smooth: bool=False) -> None:
         # init strites
         # we should init sprites after set_display_mode becaus of strite convertion
         # If we can't load sprites, we can't run the game
-        self._sprites = Sprites(file_name, self._cell_width, self._cell_height,
-            transparent_color, separator_width)
-        self._sprites.cursor.set_alpha(cursor_alpha)
-
-        # Experimental! (for inc/dec window size)
-        # self._sprites_source = deepcopy(self._sprites) # It won't work
-        self._sprites_source = Sprites(file_name, self._cell_width, self._cell_height,
-            transparent_color, separator_width)
-        self._sprites_source.cursor.set_alpha(cursor_alpha)
+        # The sheet is loaded once, scaled sprites (for inc/dec cell size)
+        # are made and cached by the atlas
+        self._atlas = SpriteAtlas(file_name, self._cell_width, self._cell_height,
+            transparent_color, separator_width, cursor_alpha, smooth)
+        self._sprites = self._atlas.get((self._cell_width, self._cell_height))
+        if self._renderer is not None:
+            # The renderer scales the sprites itself
+            self._renderer.set_sprites(self._atlas.source)
 
     def _init_icons(self, file_name: str,
         transparent_color: pg.Color | None=None) -> None:
@@ -465,90 +843,265 @@ class LightsGame:
 
         # To do: it should be refactored!
         self._quit_msg = StaticMessage(self.MSG_QUIT, self._screen, condition,
-            None, True, pg.font.Font(None, font_size), Align.CENTER,
+            None, True, get_font(None, font_size), Align.CENTER,
             self._message_text_color, self._message_background_color, frame_width,
             self._message_frame_color, self._message_alpha,
             frame_vert_indent, frame_hor_indent)
         self._game_over_msg = Message(self.MSG_HAS_WON, self._screen, condition,
-            None, True, pg.font.Font(None, font_size), Align.CENTER,
+            None, True, get_font(None, font_size), Align.CENTER,
             self._message_text_color, self._message_background_color, frame_width,
             self._message_frame_color, self._message_alpha,
             frame_vert_indent, frame_hor_indent)
         self._info_msg = StaticMessage(self.MSG_INFO, self._screen, condition,
-            None, True, pg.font.Font(None, font_size), Align.LEFT,
+            None, True, get_font(None, font_size), Align.LEFT,
+            self._message_text_color, self._message_background_color, frame_width,
+            self._message_frame_color, self._message_alpha,
+            frame_vert_indent, frame_hor_indent)
+        self._welcome_msg = StaticMessage(self.MSG_WELCOME, self._screen, condition,
+            None, True, get_font(None, font_size), Align.CENTER,
             self._message_text_color, self._message_background_color, frame_width,
             self._message_frame_color, self._message_alpha,
             frame_vert_indent, frame_hor_indent)
 
     def _run_game_loop(self) -> None:
         while True:
+            self._start_frame()
             # _process_input() returns False if user wants to quit
-            if not self._process_input():
+            with self._measure("process_input"):
+                is_running = self._process_input()
+            if not is_running:
                 break
             
-            self._update_logic()
+            with self._measure("update_logic"):
+                self._update_logic()
             
             self._update_screen()
+            self._end_frame()
+
+            self._clock.tick(self.FPS)  # limits FPS to 60 # dt = clock.tick(60) / 1000
 
-            self._clock.tick(60)  # limits FPS to 60 # dt = clock.tick(60) / 1000
+    def _run_event_loop(self) -> None:
+        """ It works like _run_game_loop(), but it sleeps until an event
+            (input, cursor motion, window events...) instead of polling.
+            The screen is redrawn only if something has changed (see _update_screen()),
+            so engine changes are shown after the event, which has caused them
+            (or after IDLE_WAIT_TIMEOUT at most) """
+        while True:
+            events = [pg.event.wait(self.IDLE_WAIT_TIMEOUT)]  # NOEVENT on timeout
+            events.extend(pg.event.get())
+            self._start_frame()  # waiting isn't a part of a frame
+            with self._measure("process_input"):
+                is_running = self._process_input(events)
+            if not is_running:
+                break
+
+            with self._measure("update_logic"):
+                self._update_logic()
+
+            self._update_screen()
+            self._end_frame()
 
+            # Still limits FPS while events are coming (e.g. mouse motion)
+            self._clock.tick(self.FPS)
 
     def _update_screen_size(self) -> None:  # Rename this?
         screen_size = self.screen_size
 
-        self._background = pg.Surface(screen_size)
-        fill_surface(self._background, self._background_image)
-        
-        self._screen = pg.display.set_mode(screen_size)
-        self._background = self._background.convert()  # Is it useful?
+        if self._renderer is not None:
+            # The display is hidden, it's needed only for surfaces convertion
+            if self._screen is None:
+                self._screen = pg.display.set_mode((1, 1), pg.HIDDEN)
+            self._renderer.size = screen_size
+        # Setting the same mode again only makes the window blink
+        elif self._screen is None or self._screen.get_size() != screen_size:
+            self._screen = pg.display.set_mode(screen_size)
+        self._background = self._get_background(screen_size)
+        self._set_view(self._view_x, self._view_y)  # the field could be smaller now
+        self._invalidate_screen()
+
+    def _get_background(self, size: tuple[int, int]) -> pg.Surface:
+        """ The background image is tiled once over the biggest screen,
+            a background of any screen size is a part of it (a subsurface) """
+        background = self._backgrounds.get(size)
+        if background is None:
+            if self._tiled_background is None:
+                self._tiled_background = pg.Surface(self._max_screen_size)
+                fill_surface(self._tiled_background, self._background_image)
+                self._tiled_background = self._tiled_background.convert()
+            background = self._tiled_background.subsurface((0, 0), size)
+            self._backgrounds[size] = background
+        return background
 
     def _set_icon(self) -> None:
         if self._icons is not None and self._current_icon_state != self._engine.is_net_united:
             self._current_icon_state = not self._current_icon_state
-            pg.display.set_icon(self._icons[self._current_icon_state])
+            icon = self._icons[self._current_icon_state]
+            if self._renderer is not None:
+                self._renderer.set_icon(icon)
+            else:
+                pg.display.set_icon(icon)
 
-    def _process_input(self) -> bool:
-        """ It returns False if game loop has to be broken (event.type == USEREVENT) """
+    def _process_input(self, events: list[pg.event.Event] | None=None) -> bool:
+        """ It returns False if game loop has to be broken (event.type == USEREVENT).
+            If events is None, it polls for events """
         # poll for events
-        for event in pg.event.get():
+        for event in (events if events is not None else pg.event.get()):
             #print(event)
             if event.type == pg.USEREVENT: #pg.QUIT:
                 return False
+            if event.type in (pg.WINDOWEXPOSED, pg.VIDEOEXPOSE):
+                self._invalidate_screen()
             self._handle_input(event)
         return True
 
     def _update_logic(self) -> None:
-        # Game over
-        if self._engine.is_net_united:
+        # Game over (the net can't be changed while a message is shown,
+        # so the message is opened once)
+        if self._engine.is_net_united and not self._overlay:
             # print("Net is united!")
-            self._update_screen()
-            answer = self._game_over_msg.show(self._get_game_over_msg())
-            if answer.key == pg.K_ESCAPE:
-                pg.event.post(pg.event.Event(pg.USEREVENT, {"code": 0})) #pg.QUIT
-            else:
-                self._engine.new_game()
+            self._game_over_msg.render(self._get_game_over_msg())
+            play_again = self._get_closing_command(self._engine.new_game)
+            self._open_message(self._game_over_msg, {pg.K_ESCAPE: self._post_quit_event,
+                pg.K_RETURN: play_again, pg.K_SPACE: play_again})
 
     def _update_screen(self) -> None:
-        # Draw background
-        self._screen.blit(self._background, (0, 0))
-        
-        # Draw net/field
-        self._draw_net()
-        
-        # Draw cursor
-        self._draw_cursor()
+        if self._profiler_image is not None:
+            self._update_profiler_image()
+        dirty = self._engine.field.pop_dirty()
+        cursor_cell = self._get_cursor_cell()
+        if self._renderer is not None:
+            self._render_frame(dirty, cursor_cell)
+        else:
+            self._update_net_blits(dirty)
+        if self._renderer is None and dirty is not None and not self._is_screen_invalid:
+            # Redraw only changed cells and the cells under the old and new cursor
+            width = self._engine.field_width
+            cells = {(i % width, i // width) for i in dirty}
+            if cursor_cell != self._cursor_cell:
+                cells.update(c for c in (self._cursor_cell, cursor_cell) if c is not None)
+            with self._measure("draw_net"):
+                rects = self._redraw_cells(cells, cursor_cell)
+            if (self._overlay_rect is not None
+                    and self._overlay_rect.collidelist(rects) != -1):
+                # Messages are (semi)transparent, so they are drawn over the whole screen
+                self._invalidate_screen()
+            elif rects:
+                with self._measure("flip"):
+                    pg.display.update(rects)
+        if self._renderer is None and (dirty is None or self._is_screen_invalid):
+            # Draw background
+            self._screen.blit(self._background, (0, 0))
+            # Draw net/field
+            with self._measure("draw_net"):
+                self._draw_net()
+            # Draw cursor
+            with self._measure("draw_cursor"):
+                self._draw_cursor(cursor_cell)
+            # Draw messages and timings
+            self._overlay_rect = self._overlay.draw()
+            if self._profiler_image is not None:
+                rect = self._screen.blit(self._profiler_image, (0, 0))
+                self._overlay_rect = (rect if self._overlay_rect is None
+                                      else self._overlay_rect.union(rect))
+            # flip() the display to put your work on screen
+            with self._measure("flip"):
+                pg.display.flip()
+            self._is_screen_invalid = False
+        self._cursor_cell = cursor_cell
 
         # Show score/moves
-        pg.display.set_caption(
-            f"{self.SCORE_CAPTION[self._engine.is_net_united]}: {self._engine.score}")
+        caption = f"{self.SCORE_CAPTION[self._engine.is_net_united]}: {self._engine.score}"
+        if caption != self._caption:
+            self._caption = caption
+            if self._renderer is not None:
+                self._renderer.set_caption(caption)
+            else:
+                pg.display.set_caption(caption)
 
         # Set/update icon
         self._set_icon()  # Icon will be reset only if needed
 
-        # flip() the display to put your work on screen
-        pg.display.flip()
-        #pg.display.update() # ?
+    def _invalidate_screen(self) -> None:
+        """ The whole screen will be redrawn on the next _update_screen() """
+        self._is_screen_invalid = True
 
+    def _render_frame(self, dirty: set[int] | None, cursor_cell: tuple[int, int] | None) -> None:
+        """ It draws the screen by the texture renderer. A frame is always drawn
+            as a whole (the renderer keeps no frame after present()), but only
+            if something has changed """
+        if (dirty is not None and not dirty and not self._is_screen_invalid
+                and cursor_cell == self._cursor_cell):
+            return
+        renderer = self._renderer
+        screen_rect = pg.Rect((0, 0), self.screen_size)
+        renderer.draw_background(self._tiled_background, screen_rect)
+        rect = pg.Rect(0, 0, self._cell_width, self._cell_height)
+        x0, y0, x1, y1 = self._get_visible_cells()
+        with self._measure("draw_net"):
+            for y in range(y0, y1):
+                rect.y = y * self._cell_height - self._view_y
+                for x in range(x0, x1):
+                    rect.x = x * self._cell_width - self._view_x
+                    renderer.draw_tile(*self._get_tile_key(x, y), rect)
+        if cursor_cell is not None:
+            with self._measure("draw_cursor"):
+                x, y = cursor_cell
+                rect.topleft = (x * self._cell_width - self._view_x,
+                                y * self._cell_height - self._view_y)
+                renderer.draw_cursor(rect, self._atlas.cursor_alpha)
+        for message in self._overlay:
+            renderer.draw_surface(*message.place(screen_rect))
+        if self._profiler_image is not None:
+            renderer.draw_surface(self._profiler_image, self._profiler_image.get_rect())
+        with self._measure("flip"):
+            renderer.present()
+        self._is_screen_invalid = False
+
+
+    def _start_profiler(self, dump_file_name: str | None=None) -> None:
+        """ dump_file_name - all the timings are written to it (see Profiler) """
+        self._profiler = Profiler(dump_file_name=dump_file_name)
+        # update_turned() - a turn, update() - a new game or go through switching
+        self._profiler.instrument(Net, "update", "update_turned", "generate", "disassemble")
+        self._set_profiler_context()
+
+    def _measure(self, stage: str):  # -> context manager
+        """ with self._measure(stage): ... - it records the duration of the stage
+            (if the profiler is started) """
+        if self._profiler is None:
+            return _NO_MEASURE
+        return self._profiler.measure(stage)
+
+    def _start_frame(self) -> None:
+        if self._profiler is not None:
+            self._set_profiler_context()
+            self._profiler.start_frame()
+
+    def _set_profiler_context(self) -> None:
+        # Timings are grouped by boards
+        level = self._engine.level
+        self._profiler.set_context(width=level.field_size[0], height=level.field_size[1],
+            go_through=level.go_through, algorithm=level.maze_algorithm.name,
+            seed=level.seed)
+
+    def _end_frame(self) -> None:
+        if self._profiler is not None:
+            self._profiler.end_frame()
+
+    def _update_profiler_image(self, force: bool=False) -> None:
+        """ It renders the timings (not more often than PROFILER_OVERLAY_PERIOD) """
+        now = pg.time.get_ticks()
+        if not force and now - self._profiler_image_time < self.PROFILER_OVERLAY_PERIOD:
+            return
+        self._profiler_image_time = now
+        self._profiler_image = render_text_board(
+            self._profiler.get_summary() or ["Timings: no frames yet"],
+            get_font(None, self.PROFILER_FONT_SIZE), Align.LEFT,
+            self._message_text_color, self._message_background_color,
+            self._message_frame_width, self._message_frame_color,
+            self._message_vert_indent // 2, self._message_hor_indent)
+        self._profiler_image.set_alpha(self._message_alpha)
+        self._invalidate_screen()
 
     def _handle_input(self, event: pg.event.Event) -> None:
         # 1. Translate input and prepare extra data (if needed)
@@ -563,16 +1116,41 @@ class LightsGame:
             case pg.MOUSEMOTION:
                 pass  # move cursor here
             case pg.MOUSEWHEEL:
-                pass
+                data.append((event.x, event.y))
 
         # 2. Do the command
         self._do_command(input, *data)
 
     def _do_command(self, input: UserInput, *args) -> None:
-        command = self._commands.get(input)
+        # An open message takes all the input (see _open_message())
+        commands = self._overlay.top_data if self._overlay else self._commands
+        command = commands.get(input)
         if command is not None:
             command(*args)
 
+    def _open_message(self, message: Message | StaticMessage,
+        commands: dict[int, Callable[[], None]]) -> None:
+        """ It shows the message over the game until it's closed (see _close_message()).
+            commands - {key: command}, other input is ignored while it's shown """
+        self._overlay.push(message,
+            {UserInput(pg.KEYDOWN, key): command for key, command in commands.items()})
+        self._invalidate_screen()
+
+    def _close_message(self) -> None:
+        """ It closes the topmost message """
+        self._overlay.pop()
+        self._invalidate_screen()
+
+    def _get_closing_command(self, command: Callable[[], None]) -> Callable[[], None]:
+        """ It returns a command, which closes the topmost message and does command """
+        def close_and_do() -> None:
+            self._close_message()
+            command()
+        return close_and_do
+
+    def _post_quit_event(self) -> None:
+        pg.event.post(pg.event.Event(pg.USEREVENT, {"code": 0})) #pg.event.Event(pg.QUIT))
+
     def _get_game_over_msg(self) -> tuple[str]:
         return (
             self.MSG_HAS_WON,
@@ -581,81 +1159,151 @@ class LightsGame:
         )
 
     def _show_welcome_message(self) -> None:
-        cond = get_is_key_down_in((pg.K_F1, pg.K_ESCAPE, pg.K_RETURN, pg.K_SPACE))
-        answer = show_custom_message(self.MSG_WELCOME, self._screen, cond,#msg_exit_cond,
-            None, True, pg.font.Font(None, self._message_font_size), Align.CENTER,
-            self._message_text_color, self._message_background_color,
-            self._message_frame_width, self._message_frame_color, self._message_alpha,
-            self._message_vert_indent, self._message_hor_indent)
-        if answer.key == pg.K_F1:
-            pg.event.post(pg.event.Event(pg.KEYDOWN, {"key": pg.K_F1}))
+        commands = dict.fromkeys((pg.K_ESCAPE, pg.K_RETURN, pg.K_SPACE), self._close_message)
+        commands[pg.K_F1] = self._get_closing_command(self.show_info)
+        self._open_message(self._welcome_msg, commands)
 
 
-    def _draw_cell(self, x: int, y: int):
-        # There is no need to do range check
-        pos = (x * self._cell_width, y * self._cell_height)
+    def _get_tile_key(self, x: int, y: int) -> tuple[int, bool, bool]:
+        """ (fork mask, is_plugged, is_power) of the cell (see Sprites.get_tile()) """
         cell = self._engine.field(x, y)
-        # Draw fork
-        for dir in cell.fork:
-            self._screen.blit(self._sprites.forks[dir.value][cell.is_plugged], pos)
-        # Draw power
-        if Point(x, y) == self._engine._power_pos:
-            self._screen.blit(self._sprites.power, pos)
-        # Draw house
-        elif cell.fork.count == 1:
-            self._screen.blit(self._sprites.houses[cell.is_plugged], pos)
-        # Draw cursor .. (move it here? Now it is in _update_screen())
+        power_pos = self._engine._power_pos
+        return (cell.fork.mask, cell.is_plugged, x == power_pos.x and y == power_pos.y)
 
     def _draw_net(self):
-        self._engine.field.for_each_index(lambda x, y: self._draw_cell(x, y))
+        # Only visible cells are drawn (fork and power or house are composed in one tile)
+        self._screen.blits(self._net_blits, doreturn=False)
+
+    def _update_net_blits(self, dirty: set[int] | None) -> None:
+        """ It keeps the sequence of (tile, pos) of the visible cells (see _draw_net())
+            up to date: the sequence is rebuilt if the view, the sprites or the whole
+            net have changed, otherwise only the dirty cells are patched """
+        visible_cells = self._get_visible_cells()
+        x0, y0, x1, y1 = visible_cells
+        key = (visible_cells, self._view_x, self._view_y, self._sprites)
+        get_tile = self._sprites.get_tile
+        if dirty is None or key != self._net_blits_key:
+            self._net_blits_key = key
+            self._net_blits = [(get_tile(*self._get_tile_key(x, y)),
+                                (x * self._cell_width - self._view_x,
+                                 y * self._cell_height - self._view_y))
+                               for y in range(y0, y1) for x in range(x0, x1)]
+            return
+        width = self._engine.field_width
+        row_length = x1 - x0
+        for i in dirty:
+            x, y = i % width, i // width
+            if x0 <= x < x1 and y0 <= y < y1:
+                j = (y - y0) * row_length + x - x0
+                self._net_blits[j] = (get_tile(*self._get_tile_key(x, y)), self._net_blits[j][1])
+
+    def _get_visible_cells(self) -> tuple[int, int, int, int]:
+        """ (x0, y0, x1, y1) - visible cells are x0 <= x < x1, y0 <= y < y1 """
+        width, height = self.screen_size
+        return (self._view_x // self._cell_width, self._view_y // self._cell_height,
+                min(ceil((self._view_x + width) / self._cell_width), self._engine.field_width),
+                min(ceil((self._view_y + height) / self._cell_height), self._engine.field_height))
+
+    def _get_cell_at(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """ The cell at the screen position (it could be out of the field) """
+        x, y = pos
+        return ((x + self._view_x) // self._cell_width, (y + self._view_y) // self._cell_height)
+
+    def _set_view(self, x: int, y: int) -> None:
+        """ It scrolls the field, so the field pixel (x, y) is at the top left
+            corner of the screen (as close as possible) """
+        field_width, field_height = self.field_pixel_size
+        width, height = self.screen_size
+        x = fit_into(x, 0, field_width - width)
+        y = fit_into(y, 0, field_height - height)
+        if (x, y) != (self._view_x, self._view_y):
+            self._view_x, self._view_y = x, y
+            self._invalidate_screen()
+
+    def _redraw_cells(self, cells: set[tuple[int, int]],
+        cursor_cell: tuple[int, int] | None) -> list[pg.Rect]:
+        """ It draws the visible ones of cells over the background (by one blits()
+            call) and returns their rects (the visible parts of them) """
+        x0, y0, x1, y1 = self._get_visible_cells()
+        row_length = x1 - x0
+        screen_rect = self._screen.get_rect()
+        blits = list()
+        rects = list()
+        for x, y in cells:
+            if x0 <= x < x1 and y0 <= y < y1:
+                tile_blit = self._net_blits[(y - y0) * row_length + x - x0]
+                rect = screen_rect.clip(
+                    pg.Rect(tile_blit[1], (self._cell_width, self._cell_height)))
+                blits.append((self._background, rect, rect))
+                blits.append(tile_blit)
+                rects.append(rect)
+        self._screen.blits(blits, doreturn=False)
+        if cursor_cell in cells:
+            self._draw_cursor(cursor_cell)
+        return rects
+
+    def _get_cursor_cell(self) -> tuple[int, int] | None:
+        """ The cell under the mouse or None if the cursor isn't shown """
+        if not self._show_cursor or self._engine.is_net_united or self._overlay:
+            return None
+        x, y = self._get_cell_at(pg.mouse.get_pos())
+        if not self._engine.field.does_pos_exist_xy(x, y):
+            return None
+        return (x, y)
 
-    def _draw_cursor(self) -> None:
-        if self._show_cursor and not self._engine.is_net_united:
-            x, y = pg.mouse.get_pos()
-            self._screen.blit(self._sprites.cursor, (
-                (x // self._cell_width) * self._cell_width,
-                (y // self._cell_height) * self._cell_height))
+    def _draw_cursor(self, cursor_cell: tuple[int, int] | None) -> None:
+        if cursor_cell is not None:
+            x, y = cursor_cell
+            self._screen.blit(self._sprites.cursor,
+                (x * self._cell_width - self._view_x, y * self._cell_height - self._view_y))
 
     # Experimental
-    def _scale_field(self, scale_step: int=2) -> None:
+    def _scale_field(self, scale_step: int=2, anchor: tuple[int, int] | None=None) -> None:
+        """ anchor - the screen point, which stays over the same field point
+            (None - the center of the screen) """
         def is_valid(size: int) -> bool:
             return 30 <= (size + scale_step) <= 200
         if not is_valid(self._cell_width) or not is_valid(self._cell_height):
             return
+        if anchor is None:
+            width, height = self.screen_size
+            anchor = (width // 2, height // 2)
+        # The anchor position in cells
+        cell_x = (self._view_x + anchor[0]) / self._cell_width
+        cell_y = (self._view_y + anchor[1]) / self._cell_height
         self._cell_width += scale_step
         self._cell_height += scale_step
         self._update_screen_size()
+        self._set_view(round(cell_x * self._cell_width) - anchor[0],
+                       round(cell_y * self._cell_height) - anchor[1])
         self._scale_sprites()
 
     # Experimental
     def _scale_sprites(self) -> None:
-        size = (self._cell_width, self._cell_height)
-        # Forks
-        for d in Direction: #.value:
-            for b in (False, True):
-                self._sprites.forks[d.value][b] = pg.transform.scale(
-                    self._sprites_source.forks[d.value][b], size)
-        # Houses
-        for b in (False, True):
-            self._sprites.houses[b] = pg.transform.scale(
-                self._sprites_source.houses[b], size)
-        # Others
-        self._sprites.power = pg.transform.scale(self._sprites_source.power, size)
-        self._sprites.cursor = pg.transform.scale(self._sprites_source.cursor, size)
+        if self._renderer is not None:
+            return  # the renderer scales the sprites itself
+        # Every size has its own sprites (with their own composed tiles)
+        width, height = self._cell_width, self._cell_height
+        self._sprites = self._atlas.get((width, height))
+        # The next zoom steps are likely, so they are scaled in advance
+        step = self.CELL_SCALE_STEP
+        self._atlas.prefetch(((width + step, height + step), (width - step, height - step)))
 
 
 
 """ functions """
 
 
+_NO_MEASURE = nullcontext()  # see LightsGame._measure()
+
+
 def fill_surface(source: pg.surface.Surface,
                  background: pg.surface.Surface) -> None:
     bg_width, bg_height = background.get_size()
     width = ceil(source.get_width() / bg_width)
     height = ceil(source.get_height() / bg_height)
-    for j in range(height):
-        for i in range(width):
-            source.blit(background, (i * bg_width, j * bg_height))
+    source.blits([(background, (i * bg_width, j * bg_height))
+                  for j in range(height) for i in range(width)], doreturn=False)
 
 
 """
@@ -0,0 +1,284 @@
+"""
+(c) Vitaly Smirnov [VSdev]
+mrmaybelately@gmail.com
+https://github.com/vitsmirnov
+2024
+"""
+
+import mmap
+import os
+import struct
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import islice
+
+from lights_core import Engine, LevelData, MazeAlgorithm
+
+
+# classes list
+class BoardRecord: ...
+class LevelPack: ...
+
+
+# Text boards file format:
+#   the first line -
+#   "# lights boards: <width> <height> <go_through> <algorithm> [<unique>]"
+#   then a line per board -
+#   "<seed> <turned_cells_count> <back_steps_count> <forks> <solved_forks>",
+#   where forks is a fork mask (a hex digit) per cell, row by row
+TEXT_HEADER = "# lights boards:"
+
+# Binary board format (little-endian):
+#   header (see BOARD_HEADER): width, height, flags (bit 0 - go_through,
+#     bit 1 - unique), maze algorithm, seed (signed, see SEED_MIN/SEED_MAX),
+#     power position (x, y), score constants (Engine.SCORE_GO_THROUGH_COEFF,
+#     Engine.POINTS_PER_CELL), turned_cells_count, back_steps_count
+#   forks, then solved forks - fork masks packed two per byte (the first cell
+#     of a pair is in the high nibble), (area + 1) // 2 bytes each
+BOARD_HEADER = struct.Struct("<HHBBqHHHHII")
+BOARD_GO_THROUGH = 1
+BOARD_UNIQUE = 2
+SEED_MIN = -2**63
+SEED_MAX = 2**63 - 1
+
+# Level pack format (little-endian):
+#   header (see PACK_HEADER): magic, version, number of boards, index offset
+#   boards (in the binary board format)
+#   index - an offset (u64) of every board, so any board is found in O(1)
+PACK_HEADER = struct.Struct("<4sHIQ")
+PACK_MAGIC = b"LPAK"
+PACK_VERSION = 1
+PACK_INDEX_ITEM = struct.Struct("<Q")
+
+# [byte] -> its high/low nibble (for unpacking forks without Python loops)
+_HIGH_NIBBLES = bytes(b >> 4 for b in range(256))
+_LOW_NIBBLES = bytes(b & 0xF for b in range(256))
+
+
+@dataclass
+class BoardRecord:
+    level: LevelData  # with the seed of the board
+    turned_cells_count: int
+    back_steps_count: int
+    forks: bytes  # disassembled (row by row, see Net.forks)
+    solved_forks: bytes  # assembled
+
+    def to_bytes(self) -> bytes:
+        """ It returns the board in the binary board format """
+        w, h = self.level.field_size
+        flags = (BOARD_GO_THROUGH if self.level.go_through else 0) | (
+            BOARD_UNIQUE if self.level.unique else 0)
+        return BOARD_HEADER.pack(w, h, flags,
+            self.level.maze_algorithm.value, self.level.seed or 0,
+            (w-1) // 2, (h-1) // 2,  # see Engine._power_pos
+            Engine.SCORE_GO_THROUGH_COEFF, Engine.POINTS_PER_CELL,
+            self.turned_cells_count, self.back_steps_count) + (
+            pack_forks(self.forks) + pack_forks(self.solved_forks))
+
+    @staticmethod
+    def from_bytes(data: bytes | memoryview | mmap.mmap, offset: int=0) -> BoardRecord:
+        """ It reads a board in the binary board format from data[offset:] """
+        (w, h, flags, algorithm, seed, _, _, _, _, turned_cells_count,
+            back_steps_count) = BOARD_HEADER.unpack_from(data, offset)
+        area = w * h
+        forks_start = offset + BOARD_HEADER.size
+        forks_size = (area + 1) // 2
+        solved_start = forks_start + forks_size
+        return BoardRecord(
+            LevelData((w, h), bool(flags & BOARD_GO_THROUGH), MazeAlgorithm(algorithm),
+                seed, bool(flags & BOARD_UNIQUE)),
+            turned_cells_count, back_steps_count,
+            unpack_forks(bytes(data[forks_start:solved_start]), area),
+            unpack_forks(bytes(data[solved_start:solved_start + forks_size]), area))
+
+    def load_into(self, engine: Engine) -> None:
+        """ It starts a game on this board """
+        engine.load_game(self.level, self.forks, self.solved_forks,
+            self.turned_cells_count, self.back_steps_count)
+
+
+class LevelPack:
+    """ A level pack file opened with mmap. Boards are read on demand:
+        pack[i] finds board i through the index and decodes only that board """
+    def __init__(self, file_name: str):
+        self._file = open(file_name, "rb")
+        try:
+            self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, self._count, self._index_offset = (
+                PACK_HEADER.unpack_from(self._data))
+        except (ValueError, struct.error):  # an empty or too short file
+            self._file.close()
+            raise ValueError(f"\"{file_name}\" isn't a level pack")
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.close()
+            raise ValueError(f"\"{file_name}\" isn't a level pack (version {PACK_VERSION})")
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> BoardRecord:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"board index out of range: {index}")
+        offset, = PACK_INDEX_ITEM.unpack_from(self._data,
+            self._index_offset + index * PACK_INDEX_ITEM.size)
+        return BoardRecord.from_bytes(self._data, offset)
+
+    def __iter__(self):  # -> Iterator[BoardRecord]
+        for i in range(self._count):
+            yield self[i]
+
+    def load_into(self, index: int, engine: Engine) -> None:
+        self[index].load_into(engine)
+
+    def close(self) -> None:
+        self._data.close()
+        self._file.close()
+
+    def __enter__(self) -> LevelPack:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def generate_board(level: LevelData, engine: Engine | None=None) -> BoardRecord | None:
+    """ It generates a board for level (level.seed shouldn't be None to get
+        a reproducible board). engine could be reused for a number of boards.
+        It returns None if level.unique, but there is no unique board for
+        the seed (see Engine.level) """
+    if engine is None:
+        engine = Engine(level)
+    else:
+        engine.set_settings(level.field_size, level.go_through,
+            level.maze_algorithm, unique=level.unique)
+        engine.new_game(level.seed)
+    if level.unique and not engine.level.unique:
+        return None
+    return BoardRecord(engine.level, engine.turned_cells_count,
+        engine.back_steps_count, engine.field.forks, engine.solved_forks)
+
+
+def generate_boards(level: LevelData, seeds):  # -> Iterator[BoardRecord]
+    """ Seeds without a unique board are skipped (if level.unique) """
+    engine = Engine(level)
+    for seed in seeds:
+        board = generate_board(replace(level, seed=seed), engine)
+        if board is not None:
+            yield board
+
+
+def generate_level_pack(level: LevelData, seeds, workers: int | None=None,
+    chunk_size: int=64):  # -> Iterator[BoardRecord]
+    """ It works like generate_boards(), but boards are generated by a pool
+        of processes (workers - number of processes, None - number of CPUs).
+        Boards are yielded in the order of seeds as soon as they are ready.
+        Only a few chunks (of chunk_size boards) are in progress at a time,
+        so the whole pack is never held in memory. Every board is seeded
+        by its own seed, so the result doesn't depend on workers/chunk_size """
+    seeds = iter(seeds)
+    def next_chunk() -> list[int]:
+        return list(islice(seeds, chunk_size))
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(workers) as executor:
+        max_pending = workers * 2  # enough to keep all the workers busy
+        pending = deque()
+        while True:
+            while len(pending) < max_pending:
+                chunk = next_chunk()
+                if not chunk:
+                    break
+                pending.append(executor.submit(_generate_chunk, level, chunk))
+            if not pending:
+                break
+            yield from pending.popleft().result()
+
+
+def write_boards_text(file_name: str, level: LevelData, boards) -> int:
+    """ It writes boards (all of them are of the level) to a text file
+        and returns a number of written boards """
+    count = 0
+    with open(file_name, "w") as f:
+        w, h = level.field_size
+        f.write(f"{TEXT_HEADER} {w} {h} {int(level.go_through)} "
+                f"{level.maze_algorithm} {int(level.unique)}\n")
+        for board in boards:
+            f.write(f"{board.level.seed} {board.turned_cells_count} "
+                    f"{board.back_steps_count} {forks_to_hex(board.forks)} "
+                    f"{forks_to_hex(board.solved_forks)}\n")
+            count += 1
+    return count
+
+
+def write_level_pack(file_name: str, boards) -> int:
+    """ It writes boards to a level pack file (boards are written one by one,
+        so they could be generated on the fly) and returns a number of boards """
+    offsets = array("Q")
+    with open(file_name, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, 0, 0))
+        for board in boards:
+            offsets.append(f.tell())
+            f.write(board.to_bytes())
+        index_offset = f.tell()
+        f.write(b"".join(PACK_INDEX_ITEM.pack(o) for o in offsets))
+        f.seek(0)
+        f.write(PACK_HEADER.pack(PACK_MAGIC, PACK_VERSION, len(offsets), index_offset))
+    return len(offsets)
+
+
+def read_boards_text(file_name: str):  # -> Iterator[BoardRecord]
+    with open(file_name, "r") as f:
+        header = f.readline()
+        if not header.startswith(TEXT_HEADER):
+            raise ValueError(f"\"{file_name}\" isn't a boards file")
+        w, h, go_through, algorithm, *unique = header[len(TEXT_HEADER):].split()
+        unique = bool(int(unique[0])) if unique else False  # older files
+        for line in f:
+            seed, turned, back_steps, forks, solved_forks = line.split()
+            yield BoardRecord(
+                LevelData((int(w), int(h)), bool(int(go_through)),
+                    MazeAlgorithm[algorithm], int(seed), unique),
+                int(turned), int(back_steps), hex_to_forks(forks),
+                hex_to_forks(solved_forks))
+
+
+# A worker process keeps its own engine (and its own random generator)
+_worker_engine: Engine | None = None
+
+def _generate_chunk(level: LevelData, seeds: list[int]) -> list[BoardRecord]:
+    global _worker_engine
+    if _worker_engine is None:
+        _worker_engine = Engine(level)
+    boards = (generate_board(replace(level, seed=seed), _worker_engine)
+              for seed in seeds)
+    return [board for board in boards if board is not None]
+
+
+""" functions """
+
+def forks_to_hex(forks: bytes) -> str:
+    return "".join(f"{mask:x}" for mask in forks)
+
+def hex_to_forks(text: str) -> bytes:
+    return bytes(int(c, 16) for c in text)
+
+def pack_forks(forks: bytes) -> bytes:
+    """ It packs fork masks two per byte (the first one is in the high nibble) """
+    if len(forks) % 2:
+        forks = forks + b"\0"
+    size = len(forks) // 2
+    high = int.from_bytes(bytes(forks[0::2]), "big") << 4
+    low = int.from_bytes(bytes(forks[1::2]), "big")
+    return (high | low).to_bytes(size, "big")
+
+def unpack_forks(data: bytes, area: int) -> bytes:
+    """ It's the opposite of pack_forks() (area - number of forks) """
+    result = bytearray(len(data) * 2)
+    result[0::2] = data.translate(_HIGH_NIBBLES)
+    result[1::2] = data.translate(_LOW_NIBBLES)
+    del result[area:]
+    return bytes(result)
@@ -0,0 +1,186 @@
+"""
+(c) Vitaly Smirnov [VSdev]
+mrmaybelately@gmail.com
+https://github.com/vitsmirnov
+2024
+"""
+
+import random
+from collections import deque
+from enum import Enum
+
+
+# Maze generators. All of them build a random spanning tree of a grid:
+#  - forks - fork masks of the cells (bit N - direction N), they have to be
+#    cleared (zeroed) before generation
+#  - neighbours - a neighbour table: [cell index][direction] -> index or -1
+#    (see lights_core.neighbour_table()), so they support go_through too
+#  - start - index of the first cell
+#  - rng - a random generator (random.Random or the random module itself)
+
+
+# classes list
+class MazeAlgorithm: ...
+
+
+DIRECTIONS_COUNT = 4
+_BITS = tuple(1 << d for d in range(DIRECTIONS_COUNT))
+_OPPOSITE_BITS = tuple(1 << ((d + 2) % DIRECTIONS_COUNT) for d in range(DIRECTIONS_COUNT))
+
+
+class MazeAlgorithm(Enum):
+    DFS = 0  # randomized depth-first search (long corridors)
+    KRUSKAL = 1  # randomized Kruskal (a lot of short dead ends)
+    PRIM = 2  # randomized Prim (short dead ends, radial look)
+    WILSON = 3  # Wilson's algorithm (uniform spanning tree, it's the slowest one)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+def generate_maze(algorithm: MazeAlgorithm, forks: bytearray,
+    neighbours: tuple[tuple[int, int, int, int], ...], start: int,
+    rng=random) -> None:
+    MAZE_GENERATORS[algorithm](forks, neighbours, start, rng)
+
+
+def dfs_maze(forks: bytearray, neighbours: tuple[tuple[int, int, int, int], ...],
+    start: int, rng=random) -> None:
+    visited = bytearray(len(forks))
+    visited[start] = True
+    pos = start
+    path = list()
+    unvisited = list()
+    while True:
+        unvisited.clear()
+        cell_neighbours = neighbours[pos]
+        for dir in range(DIRECTIONS_COUNT):
+            n = cell_neighbours[dir]
+            if n >= 0 and not visited[n]:
+                unvisited.append(dir)
+        if unvisited:
+            dir = rng.choice(unvisited)
+            next_index = cell_neighbours[dir]
+            forks[pos] |= _BITS[dir]
+            forks[next_index] |= _OPPOSITE_BITS[dir]
+            path.append(pos)
+            pos = next_index
+            visited[pos] = True
+        else:
+            if len(path) == 0:
+                break
+            pos = path.pop()
+
+
+def kruskal_maze(forks: bytearray, neighbours: tuple[tuple[int, int, int, int], ...],
+    start: int, rng=random) -> None:
+    # start isn't needed here (every cell is a tree at the beginning)
+    area = len(forks)
+    edges = [(i, dir) for i in range(area) for dir in (1, 2)  # right and down
+             if neighbours[i][dir] >= 0]
+    rng.shuffle(edges)
+
+    parents = list(range(area))  # union-find (with path halving)
+    def find(i: int) -> int:
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    edges_left = area - 1
+    for i, dir in edges:
+        n = neighbours[i][dir]
+        root_i, root_n = find(i), find(n)
+        if root_i == root_n:
+            continue
+        parents[root_i] = root_n
+        forks[i] |= _BITS[dir]
+        forks[n] |= _OPPOSITE_BITS[dir]
+        edges_left -= 1
+        if edges_left == 0:
+            break
+
+
+def prim_maze(forks: bytearray, neighbours: tuple[tuple[int, int, int, int], ...],
+    start: int, rng=random) -> None:
+    in_tree = bytearray(len(forks))
+    frontier = list()  # (cell in the tree, direction to a cell outside)
+
+    def add_cell(i: int) -> None:
+        in_tree[i] = True
+        for dir, n in enumerate(neighbours[i]):
+            if n >= 0 and not in_tree[n]:
+                frontier.append((i, dir))
+
+    add_cell(start)
+    while frontier:
+        k = rng.randrange(len(frontier))
+        frontier[k], frontier[-1] = frontier[-1], frontier[k]  # O(1) removal
+        i, dir = frontier.pop()
+        n = neighbours[i][dir]
+        if in_tree[n]:
+            continue
+        forks[i] |= _BITS[dir]
+        forks[n] |= _OPPOSITE_BITS[dir]
+        add_cell(n)
+
+
+def wilson_maze(forks: bytearray, neighbours: tuple[tuple[int, int, int, int], ...],
+    start: int, rng=random) -> None:
+    area = len(forks)
+    valid_dirs = [tuple(d for d, n in enumerate(cell) if n >= 0) for cell in neighbours]
+    in_tree = bytearray(area)
+    in_tree[start] = True
+    exits = bytearray(area)  # the last direction the walk has left a cell in
+
+    for cell in range(area):
+        # Random walk until the tree is hit (loops are erased implicitly,
+        # because only the last exit from every cell is remembered)
+        i = cell
+        while not in_tree[i]:
+            dir = rng.choice(valid_dirs[i])
+            exits[i] = dir
+            i = neighbours[i][dir]
+        # Add the loop-erased path to the tree
+        i = cell
+        while not in_tree[i]:
+            dir = exits[i]
+            n = neighbours[i][dir]
+            forks[i] |= _BITS[dir]
+            forks[n] |= _OPPOSITE_BITS[dir]
+            in_tree[i] = True
+            i = n
+
+
+def reroute_maze(forks: bytearray, neighbours: tuple[tuple[int, int, int, int], ...],
+    cell: int, dir: int, rng=random) -> None:
+    """ It adds the connection from cell in direction dir to a maze and removes
+        a random other connection of the cycle it makes (so the maze stays
+        a spanning tree, but shapes of a few forks are changed) """
+    target = neighbours[cell][dir]
+    parents = {cell: (-1, -1)}  # cell -> (previous cell, direction from it)
+    queue = deque((cell,))
+    while target not in parents:
+        i = queue.popleft()
+        for d, n in enumerate(neighbours[i]):
+            if n >= 0 and forks[i] & _BITS[d] and n not in parents:
+                parents[n] = (i, d)
+                queue.append(n)
+    path = list()  # connections between cell and target
+    i = target
+    while i != cell:
+        i, d = parents[i]
+        path.append((i, d))
+    i, d = rng.choice(path)
+    forks[i] &= ~_BITS[d]
+    forks[neighbours[i][d]] &= ~_OPPOSITE_BITS[d]
+    forks[cell] |= _BITS[dir]
+    forks[target] |= _OPPOSITE_BITS[dir]
+
+
+MAZE_GENERATORS = {
+    MazeAlgorithm.DFS: dfs_maze,
+    MazeAlgorithm.KRUSKAL: kruskal_maze,
+    MazeAlgorithm.PRIM: prim_maze,
+    MazeAlgorithm.WILSON: wilson_maze,
+}
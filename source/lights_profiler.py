@@ -0,0 +1,157 @@
+"""
+(c) Vitaly Smirnov [VSdev]
+mrmaybelately@gmail.com
+https://github.com/vitsmirnov
+2024
+"""
+
+# Frame and engine timings (there is no pygame here), e.g.:
+#   profiler = Profiler(dump_file_name="timings.csv")
+#   profiler.instrument(Net, "update", "update_turned", "generate", "disassemble")
+#   with profiler.measure("draw_net"):
+#       ...
+#   profiler.close()
+
+import csv
+import json
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+
+# classes list
+class Profiler: ...
+
+
+class Profiler:
+    """ It records durations (ms) of named stages (e.g. "draw_net" of every
+        frame) and of calls of instrumented methods (see instrument()).
+        Percentiles are rolling (of the last window durations of a name).
+        If dump_file_name is given, every sample is written to the file
+        (JSON for *.json, CSV otherwise) as soon as it's recorded, so samples
+        aren't kept in memory however long it runs """
+    DEFAULT_WINDOW = 300  # durations of a name (5 s of frames at 60 FPS)
+    PERCENTILES = (50, 95, 99)
+    FRAME = "frame"  # the name of whole frames (see start_frame()/end_frame())
+
+    def __init__(self, window: int=DEFAULT_WINDOW, dump_file_name: str | None=None):
+        self._window = window
+        self._recent: dict[str, deque[float]] = dict()  # name -> last durations
+        self._context: dict = dict()
+        self._dump_file = None
+        self._is_json = False
+        self._csv_writer = None
+        self._samples_count = 0  # written to the dump file
+        if dump_file_name:
+            self._dump_file = open(dump_file_name, "w", newline="")
+            self._is_json = dump_file_name.endswith(".json")
+            if self._is_json:
+                self._dump_file.write('{"samples": [')
+            else:
+                self._csv_writer = csv.writer(self._dump_file)
+        self._frame = 0
+        self._frame_start = 0.0
+        # (class, method name, original method) - see instrument()
+        self._originals: list[tuple[type, str, object]] = list()
+
+    @property
+    def frame(self) -> int:
+        """ Number of the current frame """
+        return self._frame
+
+    def set_context(self, **context) -> None:
+        """ context is written with the next samples (e.g. a board size),
+            so they could be grouped. Names of it shouldn't change (they are
+            CSV columns) """
+        self._context = context
+
+    def start_frame(self) -> None:
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self) -> None:
+        self.add(self.FRAME, (time.perf_counter() - self._frame_start) * 1000)
+        self._frame += 1
+
+    @contextmanager
+    def measure(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - start) * 1000)
+
+    def add(self, name: str, duration: float) -> None:
+        """ duration - in ms """
+        recent = self._recent.get(name)
+        if recent is None:
+            recent = self._recent[name] = deque(maxlen=self._window)
+        recent.append(duration)
+        if self._dump_file is not None:
+            self._write_sample(name, duration)
+
+    def names(self) -> list[str]:
+        return list(self._recent)
+
+    def percentiles(self, name: str) -> tuple[float, ...]:
+        """ Rolling PERCENTILES of name (nearest-rank), () if there are no durations """
+        durations = sorted(self._recent.get(name, ()))
+        if not durations:
+            return ()
+        count = len(durations)
+        return tuple(durations[min(count - 1, max(0, -(-p * count // 100) - 1))]
+                     for p in self.PERCENTILES)
+
+    def get_summary(self) -> list[str]:
+        """ A line per name: its rolling percentiles and the last duration """
+        lines = list()
+        for name, recent in self._recent.items():
+            values = "  ".join(f"p{p} {value:.2f}"
+                for p, value in zip(self.PERCENTILES, self.percentiles(name)))
+            lines.append(f"{name}: {values}  last {recent[-1]:.2f} ms")
+        return lines
+
+    def instrument(self, cls: type, *method_names: str) -> None:
+        """ It wraps the methods of cls, so every call of them is measured
+            (as "<class name>.<method name>") until close() """
+        for method_name in method_names:
+            method = getattr(cls, method_name)
+            self._originals.append((cls, method_name, method))
+            setattr(cls, method_name,
+                self._get_measured(method, f"{cls.__name__}.{method_name}"))
+
+    def close(self) -> int:
+        """ It restores the instrumented methods and finishes the dump file
+            (the last percentiles are added to a JSON one). It returns
+            a number of written samples """
+        for cls, method_name, method in reversed(self._originals):
+            setattr(cls, method_name, method)
+        self._originals.clear()
+        if self._dump_file is not None:
+            if self._is_json:
+                percentiles = {name: dict(zip(self.PERCENTILES, self.percentiles(name)))
+                               for name in self._recent}
+                self._dump_file.write(f'\n], "percentiles": {json.dumps(percentiles)}}}\n')
+            self._dump_file.close()
+            self._dump_file = None
+        return self._samples_count
+
+    def _write_sample(self, name: str, duration: float) -> None:
+        if self._is_json:
+            sample = {"frame": self._frame, "name": name, "ms": round(duration, 4),
+                      **self._context}
+            self._dump_file.write(("\n" if self._samples_count == 0 else ",\n")
+                                  + json.dumps(sample))
+        else:
+            if self._samples_count == 0:
+                self._csv_writer.writerow(["frame", "name", "ms", *self._context])
+            self._csv_writer.writerow([self._frame, name, f"{duration:.4f}",
+                                       *self._context.values()])
+        self._samples_count += 1
+
+    def _get_measured(self, method, name: str):  # -> function
+        @wraps(method)
+        def measured(*args, **kwargs):
+            with self.measure(name):
+                return method(*args, **kwargs)
+        return measured
@@ -0,0 +1,673 @@
+"""
+(c) Vitaly Smirnov [VSdev]
+mrmaybelately@gmail.com
+https://github.com/vitsmirnov
+2024
+"""
+
+import random
+from dataclasses import dataclass
+from threading import Event
+
+from lights_mazes import reroute_maze
+
+
+# The solver finds orientations of all forks, that assemble the net
+# (every cell is connected to the others), with the minimal number of turns.
+# A fork is a 4-bit mask (bit N - direction N, see lights_core.Fork).
+# A domain of a cell is a 16-bit set of masks (bit M - mask M), which the cell
+# could still have. Domains are narrowed by constraint propagation:
+#  - an arm has to have a pair: a cell has an arm to its neighbour
+#    if and only if the neighbour has an arm back (there are no arms to borders)
+#  - two dead ends (forks with one arm) can't be connected to each other
+#  - connections can't make a cycle or a closed island (a part of the net
+#    without free arms), because the assembled net is a spanning tree
+# Branching (with branch and bound on the number of turns) is used only
+# when propagation can't decide.
+
+
+# classes list
+class Solution: ...
+class _Snapshot: ...
+class Solver: ...
+class HintTracker: ...
+
+
+DIRECTIONS_COUNT = 4
+MAX_REPAIRS = 100  # see make_unique()
+MASKS_COUNT = 1 << DIRECTIONS_COUNT
+ALL_MASKS = (1 << MASKS_COUNT) - 1  # a domain with all masks
+NO_COST = 1 << 30  # the mask can't be reached by turns
+
+def _rotated(mask: int, turn: int) -> int:
+    return ((mask << turn) | (mask >> (DIRECTIONS_COUNT - turn))) & (MASKS_COUNT - 1)
+
+# [mask] -> domain of all its orientations
+_ORIENTATIONS = tuple(sum(1 << m for m in set(_rotated(mask, t)
+                                              for t in range(DIRECTIONS_COUNT)))
+                      for mask in range(MASKS_COUNT))
+# [mask][mask] -> minimal number of turns (left or right) from one to another
+_TURN_COST = tuple(tuple(min((min(t, DIRECTIONS_COUNT - t)
+                              for t in range(DIRECTIONS_COUNT) if _rotated(s, t) == m),
+                             default=NO_COST)
+                         for m in range(MASKS_COUNT))
+                   for s in range(MASKS_COUNT))
+# [direction] -> domain of masks with an arm in the direction / without it
+_WITH_ARM = tuple(sum(1 << m for m in range(MASKS_COUNT) if m & (1 << d))
+                  for d in range(DIRECTIONS_COUNT))
+_WITHOUT_ARM = tuple(ALL_MASKS & ~with_arm for with_arm in _WITH_ARM)
+_OPPOSITE = tuple((d + 2) % DIRECTIONS_COUNT for d in range(DIRECTIONS_COUNT))
+# [mask] -> number of arms
+_ARMS_COUNT = tuple(bin(m).count("1") for m in range(MASKS_COUNT))
+
+# domain -> tuple of its masks (domains are filled on demand, there are
+# only a few of them, because a domain is a subset of a mask's orientations)
+_MASKS_OF: dict[int, tuple[int, ...]] = dict()
+# domain -> number of undecided arms (see _open_arms())
+_OPEN_ARMS: dict[int, int] = dict()
+# (initial mask, domain) -> minimal number of turns to get any mask of the domain
+_MIN_COST: dict[tuple[int, int], int] = dict()
+
+def _masks_of(domain: int) -> tuple[int, ...]:
+    masks = _MASKS_OF.get(domain)
+    if masks is None:
+        masks = _MASKS_OF[domain] = tuple(
+            m for m in range(MASKS_COUNT) if domain & (1 << m))
+    return masks
+
+def _open_arms(domain: int) -> int:
+    """ Number of arms, which some masks of the domain have and some don't """
+    count = _OPEN_ARMS.get(domain)
+    if count is None:
+        count = _OPEN_ARMS[domain] = sum(
+            1 for d in range(DIRECTIONS_COUNT)
+            if domain & _WITH_ARM[d] and domain & _WITHOUT_ARM[d])
+    return count
+
+def _min_cost(mask: int, domain: int) -> int:
+    cost = _MIN_COST.get((mask, domain))
+    if cost is None:
+        cost = _MIN_COST[(mask, domain)] = min(
+            (_TURN_COST[mask][m] for m in _masks_of(domain)), default=NO_COST)
+    return cost
+
+
+@dataclass
+class Solution:
+    forks: bytes  # assembled fork masks
+    turns_count: int  # minimal number of turns to get forks from the initial ones
+    is_optimal: bool  # False if the search was stopped by the nodes limit
+
+
+class _Snapshot:
+    """ Sure connections (which all masks of both cells have) of domains
+        at some moment, grouped into components (it's used for cheap checks
+        of the global constraints after a few cells have been narrowed) """
+    __slots__ = ("domains", "roots", "sizes", "open_arms")
+
+    def __init__(self, domains: list[int], roots: list[int], sizes: list[int],
+        open_arms: list[int]):
+        self.domains = domains  # a copy
+        self.roots = roots  # [cell] -> root cell of its component
+        self.sizes = sizes  # [root] -> number of cells in the component
+        self.open_arms = open_arms  # [root] -> number of undecided arms
+
+
+class Solver:
+    DEFAULT_NODES_LIMIT = 20000  # branching nodes
+
+    def __init__(self, forks: bytes, neighbours: tuple[tuple[int, int, int, int], ...],
+        probe: bool=True, stop: Event | None=None):
+        """ forks - current (disassembled) fork masks, neighbours - neighbour
+            table of the net (see lights_core.neighbour_table()).
+            probe - False to skip probing (see _probe()): it's several times
+            faster on big nets, but fewer cells are decided.
+            stop - if it's set (e.g. by another thread), probing and searches
+            end as if the nodes limit is reached (the results aren't optimal) """
+        self._forks = bytes(forks)
+        self._neighbours = neighbours
+        self._area = len(forks)
+        self._stop = stop
+        self._domains = self._initial_domains(probe)
+
+    @property
+    def domains(self) -> list[int] | None:
+        """ Domains after propagation (None if the net can't be assembled) """
+        return None if self._domains is None else list(self._domains)
+
+    def turns_count(self, forks: bytes) -> int:
+        """ Number of turns needed to get forks from the initial ones """
+        return sum(_TURN_COST[s][m] for s, m in zip(self._forks, forks))
+
+    def solve(self, known: bytes | None=None,
+        nodes_limit: int=DEFAULT_NODES_LIMIT) -> Solution | None:
+        """ It returns an assembled net with the minimal number of turns or None
+            if there is no solution. known - any known solution (e.g. the
+            generated net), it's used as an upper bound and as a fallback """
+        if self._domains is None:
+            return None
+        domains = list(self._domains)
+        snapshot = self._snapshot(domains)
+
+        # Undecided regions don't share undecided arms, so at first every
+        # region is solved on its own (it's a relaxation, because the others
+        # are undecided yet). If the best region solutions fit together,
+        # the result is optimal. If they make a cycle or a closed island,
+        # the regions of it are merged and solved together. The search on all
+        # undecided cells (below) is the last resort, if merging can't help
+        # (the broken part isn't in two regions at least or the merged regions
+        # can't be solved within nodes_limit)
+        groups = self._regions(domains)
+        assignments = list()
+        is_optimal = True
+        for group in groups:
+            cost, assignment, is_complete = self._branch_and_bound(
+                domains, snapshot, group, nodes_limit, NO_COST)
+            if assignment is None:  # nodes_limit is reached (or there is no solution)
+                return self._fallback(known)
+            assignments.append(assignment)
+            is_optimal = is_optimal and is_complete
+        group_of = dict()  # cell -> index of its group
+        for k, group in enumerate(groups):
+            group_of.update(dict.fromkeys(group, k))
+
+        while True:
+            combined = list(domains)
+            for assignment in assignments:
+                for cell, domain in assignment.items():
+                    combined[cell] = domain
+            broken = self._find_broken(combined)
+            if broken is None:  # it's a spanning tree
+                result = bytes(_masks_of(domain)[0] for domain in combined)
+                return Solution(result, self.turns_count(result), is_optimal)
+            involved = sorted(set(group_of[i] for i in broken if i in group_of))
+            if len(involved) < 2:
+                break
+            merged = [cell for k in involved for cell in groups[k]]
+            cost, assignment, is_complete = self._branch_and_bound(
+                domains, snapshot, merged, nodes_limit, NO_COST)
+            if assignment is None:
+                break
+            is_optimal = is_optimal and is_complete
+            for k in reversed(involved[1:]):
+                del groups[k], assignments[k]
+            groups[involved[0]], assignments[involved[0]] = merged, assignment
+            group_of = {cell: k for k, group in enumerate(groups) for cell in group}
+
+        # Search on all undecided cells together
+        domains = list(self._domains)
+        upper_bound = NO_COST if known is None else self.turns_count(known) + 1
+        cost, assignment, is_complete = self._branch_and_bound(domains, snapshot,
+            [i for i, domain in enumerate(domains) if domain & (domain - 1)],
+            nodes_limit, upper_bound)
+        if assignment is None:
+            if is_complete:  # nothing is cheaper than known
+                return None if known is None else Solution(
+                    bytes(known), self.turns_count(known), True)
+            return self._fallback(known)
+        for cell, domain in assignment.items():
+            domains[cell] = domain
+        result = bytes(_masks_of(domain)[0] for domain in domains)
+        return Solution(result, self.turns_count(result), is_complete)
+
+    def find_solutions(self, limit: int=2,
+        nodes_limit: int=DEFAULT_NODES_LIMIT) -> list[bytes] | None:
+        """ It returns up to limit different solutions (the search stops as soon
+            as limit solutions are found). It returns None if the search has been
+            stopped by nodes_limit before (so the number of solutions is unknown) """
+        if self._domains is None:
+            return list()
+        domains = list(self._domains)
+        assignments, is_complete = self._enumerate(domains, self._snapshot(domains),
+            [i for i, domain in enumerate(domains) if domain & (domain - 1)],
+            limit, nodes_limit)
+        if not is_complete and len(assignments) < limit:
+            return None
+        solutions = list()
+        for assignment in assignments:
+            for cell, domain in assignment.items():
+                domains[cell] = domain
+            solutions.append(bytes(_masks_of(domain)[0] for domain in domains))
+        return solutions
+
+    def region_alternatives(self, nodes_limit: int=DEFAULT_NODES_LIMIT) -> list[dict[int, int]]:
+        """ It returns two ways (cell -> mask) to assemble every undecided region,
+            which has them, if the region is solved on its own (it's a fast way
+            to find all ambiguous places, but the other regions could make some
+            of the ways impossible, so find_solutions() is needed to be sure) """
+        if self._domains is None:
+            return list()
+        domains = list(self._domains)
+        snapshot = self._snapshot(domains)
+        alternatives = list()
+        for region in self._regions(domains):
+            assignments, _ = self._enumerate(domains, snapshot, region, 2, nodes_limit)
+            if len(assignments) == 2:
+                alternatives.extend({i: _masks_of(domain)[0] for i, domain in a.items()}
+                                    for a in assignments)
+        return alternatives
+
+    def count_solutions(self, limit: int=2,
+        nodes_limit: int=DEFAULT_NODES_LIMIT) -> int | None:
+        """ Number of solutions up to limit (e.g. 1 - the puzzle is unique,
+            limit - there are limit solutions at least). See find_solutions() """
+        solutions = self.find_solutions(limit, nodes_limit)
+        return None if solutions is None else len(solutions)
+
+
+    def _fallback(self, known: bytes | None) -> Solution | None:
+        """ known (see solve()) as a solution, which isn't surely optimal """
+        if known is None:
+            return None
+        return Solution(bytes(known), self.turns_count(known), False)
+
+    def _is_stopped(self) -> bool:
+        return self._stop is not None and self._stop.is_set()
+
+    def _initial_domains(self, probe: bool) -> list[int] | None:
+        neighbours, forks = self._neighbours, self._forks
+        domains = [_ORIENTATIONS[mask] for mask in forks]
+        for i, mask in enumerate(forks):
+            for d, j in enumerate(neighbours[i]):
+                if j < 0:  # there is no neighbour
+                    domains[i] &= _WITHOUT_ARM[d]
+                elif (_ARMS_COUNT[mask] == 1 and _ARMS_COUNT[forks[j]] == 1
+                      and self._area > 2):  # two dead ends
+                    domains[i] &= _WITHOUT_ARM[d]
+        if 0 in domains or self._propagate(domains, range(self._area)) is None:
+            return None
+        if probe and not self._probe(domains):
+            return None
+        return domains
+
+    def _propagate(self, domains: list[int], cells, trail: list | None=None) -> list[int] | None:
+        """ It narrows domains of the neighbours of cells (and further) until
+            nothing changes. It returns narrowed cells or None if a domain
+            becomes empty. trail - a list for (cell, previous domain) pairs """
+        neighbours = self._neighbours
+        narrowed = list()
+        queue = list(cells)
+        while queue:
+            i = queue.pop()
+            domain = domains[i]
+            for d, j in enumerate(neighbours[i]):
+                if j < 0:
+                    continue
+                # The neighbour has an arm back if and only if i has an arm
+                if domain & _WITH_ARM[d] == 0:
+                    neighbour_domain = domains[j] & _WITHOUT_ARM[_OPPOSITE[d]]
+                elif domain & _WITHOUT_ARM[d] == 0:
+                    neighbour_domain = domains[j] & _WITH_ARM[_OPPOSITE[d]]
+                else:
+                    continue
+                if neighbour_domain != domains[j]:
+                    if neighbour_domain == 0:
+                        return None
+                    if trail is not None:
+                        trail.append((j, domains[j]))
+                    domains[j] = neighbour_domain
+                    narrowed.append(j)
+                    queue.append(j)
+        return narrowed
+
+    def _snapshot(self, domains: list[int]) -> _Snapshot | None:
+        """ It returns None if the global constraints are broken:
+            sure connections make a cycle or a closed island """
+        neighbours, area = self._neighbours, self._area
+        parents = list(range(area))
+        def find(i: int) -> int:
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        for i, domain in enumerate(domains):
+            for d in (1, 2):  # every connection is checked once (right and down)
+                j = neighbours[i][d]
+                if j >= 0 and domain & _WITHOUT_ARM[d] == 0:
+                    root_i, root_j = find(i), find(j)
+                    if root_i == root_j:
+                        return None  # a cycle
+                    parents[root_i] = root_j
+
+        roots = [find(i) for i in range(area)]
+        sizes = [0] * area
+        open_arms = [0] * area
+        for i, domain in enumerate(domains):
+            sizes[roots[i]] += 1
+            open_arms[roots[i]] += _open_arms(domain)
+        for root, size in enumerate(sizes):
+            if size and not open_arms[root] and size < area:
+                return None  # a closed island
+        return _Snapshot(list(domains), roots, sizes, open_arms)
+
+    def _is_consistent(self, snapshot: _Snapshot, domains: list[int], changed) -> bool:
+        """ It checks the global constraints like _snapshot() does, but only for
+            the components of changed cells (cells narrowed since the snapshot).
+            If some other cells have been narrowed too, the check is weaker,
+            but it's still correct (it never fails a consistent state) """
+        neighbours, base, roots = self._neighbours, snapshot.domains, snapshot.roots
+        merged = dict()  # root -> root (components joined by new connections)
+        def find(root: int) -> int:
+            while root in merged:
+                root = merged[root]
+            return root
+
+        changed = set(changed)
+        involved = set()
+        for i in changed:
+            involved.add(roots[i])
+            domain, base_domain = domains[i], base[i]
+            for d, j in enumerate(neighbours[i]):
+                if j < 0 or (j < i and j in changed):  # it's checked from j
+                    continue
+                if domain & _WITHOUT_ARM[d] == 0 and base_domain & _WITHOUT_ARM[d]:
+                    root_i, root_j = find(roots[i]), find(roots[j])
+                    if root_i == root_j:
+                        return False  # a cycle
+                    merged[root_i] = root_j
+                    involved.add(roots[j])
+
+        totals = dict()  # root -> [size, undecided arms]
+        for root in involved:
+            total = totals.setdefault(find(root), [0, 0])
+            total[0] += snapshot.sizes[root]
+            total[1] += snapshot.open_arms[root]
+        for i in changed:
+            totals[find(roots[i])][1] -= _open_arms(base[i]) - _open_arms(domains[i])
+        for size, open_arms in totals.values():
+            if open_arms <= 0 and size < self._area:
+                return False  # a closed island
+        return True
+
+    def _probe(self, domains: list[int]) -> bool:
+        """ It removes masks, which break the constraints right after
+            propagation (every mask of every undecided cell is tried).
+            It returns False if there is no solution """
+        while True:
+            snapshot = self._snapshot(domains)
+            if snapshot is None:
+                return False
+            was_narrowed = False
+            for cell in range(self._area):
+                domain = domains[cell]
+                if not domain & (domain - 1):  # it's decided
+                    continue
+                if self._is_stopped():
+                    return True  # the narrowed domains are still right
+                impossible = 0
+                for mask in _masks_of(domain):
+                    trail = [(cell, domain)]
+                    domains[cell] = 1 << mask
+                    narrowed = self._propagate(domains, (cell,), trail)
+                    if narrowed is None or not self._is_consistent(
+                        snapshot, domains, [cell] + narrowed):
+                        impossible |= 1 << mask
+                    _undo(domains, trail)
+                if impossible:
+                    was_narrowed = True
+                    domains[cell] = domain & ~impossible
+                    if domains[cell] == 0 or self._propagate(domains, (cell,)) is None:
+                        return False
+            if not was_narrowed:
+                return True
+
+    def _find_broken(self, domains: list[int]) -> list[int] | None:
+        """ All cells are decided. It returns None if the net is a spanning tree
+            and cells of a closed island or of cycles (with paths between them)
+            otherwise """
+        neighbours, area = self._neighbours, self._area
+        degrees = [0] * area
+        for i, domain in enumerate(domains):
+            mask = _masks_of(domain)[0]
+            degrees[i] = sum(1 for d in range(DIRECTIONS_COUNT)
+                             if mask & (1 << d) and neighbours[i][d] >= 0)
+        # A closed island (a component smaller than the net)
+        visited = bytearray(area)
+        visited[0] = True
+        component, stack = [0], [0]
+        while stack:
+            i = stack.pop()
+            mask = _masks_of(domains[i])[0]
+            for d, j in enumerate(neighbours[i]):
+                if j >= 0 and mask & (1 << d) and not visited[j]:
+                    visited[j] = True
+                    component.append(j)
+                    stack.append(j)
+        if len(component) < area:
+            return component if 2 * len(component) <= area else [
+                i for i in range(area) if not visited[i]]
+        # Cycles: the net without its leaves (one by one)
+        leaves = [i for i in range(area) if degrees[i] <= 1]
+        while leaves:
+            i = leaves.pop()
+            mask = _masks_of(domains[i])[0]
+            degrees[i] = -1  # removed
+            for d, j in enumerate(neighbours[i]):
+                if j >= 0 and mask & (1 << d) and degrees[j] > 0:
+                    degrees[j] -= 1
+                    if degrees[j] == 1:
+                        leaves.append(j)
+        broken = [i for i in range(area) if degrees[i] > 0]
+        return broken if broken else None
+
+    def _regions(self, domains: list[int]) -> list[list[int]]:
+        """ Groups of undecided cells connected by undecided arms """
+        neighbours = self._neighbours
+        regions = list()
+        visited = bytearray(self._area)
+        for cell, domain in enumerate(domains):
+            if visited[cell] or not domain & (domain - 1):
+                continue
+            visited[cell] = True
+            region, stack = [cell], [cell]
+            while stack:
+                i = stack.pop()
+                domain = domains[i]
+                for d, j in enumerate(neighbours[i]):
+                    if (j >= 0 and not visited[j] and domain & _WITH_ARM[d]
+                        and domain & _WITHOUT_ARM[d]):
+                        visited[j] = True
+                        region.append(j)
+                        stack.append(j)
+            regions.append(region)
+        return regions
+
+    def _enumerate(self, domains: list[int], snapshot: _Snapshot, cells: list[int],
+        limit: int, nodes_limit: int) -> tuple[list[dict[int, int]], bool]:
+        """ It returns up to limit different ways to decide cells (domains of
+            cells) and False if the search has been stopped by nodes_limit.
+            domains are restored at the end """
+        assignments = list()
+        nodes_left = [nodes_limit]
+        search = self._search(domains, snapshot, cells, nodes_left, None)
+        for _ in search:
+            assignments.append({i: domains[i] for i in cells})
+            if len(assignments) >= limit:
+                search.close()
+                break
+        return assignments, nodes_left[0] > 0
+
+    def _branch_and_bound(self, domains: list[int], snapshot: _Snapshot,
+        cells: list[int], nodes_limit: int,
+        upper_bound: int) -> tuple[int, dict[int, int] | None, bool]:
+        """ It decides cells (the others should stay as they are) with
+            the minimal cost (< upper_bound). It returns the cost, domains
+            of cells (None if nothing is found) and False if the search has
+            been stopped by nodes_limit. domains are restored at the end """
+        bound = [upper_bound]
+        best = None
+        nodes_left = [nodes_limit]
+        for cost in self._search(domains, snapshot, cells, nodes_left, bound):
+            bound[0] = cost
+            best = {i: domains[i] for i in cells}
+        return bound[0], best, nodes_left[0] > 0
+
+    def _search(self, domains: list[int], snapshot: _Snapshot, cells: list[int],
+        nodes_left: list[int], bound: list[int] | None):  # -> Iterator[int]
+        """ Depth-first search, which decides cells one by one (in their order)
+            with propagation. It yields the cost of every found assignment
+            (domains have it, while the generator is suspended).
+            bound - [cost], branches, which can't be cheaper, are cut (None -
+            no bound, every assignment is found). nodes_left - [number of
+            nodes], it's decreased by every node. The lower bound is updated
+            only for narrowed cells, so a node takes time proportional to its
+            changes (not to the number of cells). It keeps its own stack
+            (nested generators would make every yield as slow as the depth).
+            domains are restored, when the generator is finished or closed """
+        forks = self._forks
+        count = len(cells)
+
+        def next_undecided(position: int) -> int:
+            while position < count:
+                domain = domains[cells[position]]
+                if domain & (domain - 1):
+                    break
+                position += 1
+            return position
+
+        def branch(position: int, changed_count: int, lower_bound: int) -> list:
+            cell = cells[position]
+            masks = _masks_of(domains[cell])
+            if bound is not None:  # the cheapest ones first
+                costs = _TURN_COST[forks[cell]]
+                masks = sorted(masks, key=costs.__getitem__)
+            # [cell, masks, next mask, trail of the current mask,
+            #  len(changed) and the lower bound before it, position in cells]
+            return [cell, masks, 0, None, changed_count, lower_bound, position]
+
+        lower_bound = sum(_min_cost(forks[i], domains[i]) for i in cells)
+        if bound is not None and lower_bound >= bound[0]:
+            return
+        position = next_undecided(0)
+        if position == count:
+            yield lower_bound
+            return
+
+        changed = list()  # cells narrowed since the snapshot
+        stack = [branch(position, 0, lower_bound)]
+        try:
+            while stack:
+                frame = stack[-1]
+                cell, masks, k, trail, changed_count, lower_bound, position = frame
+                if trail is not None:  # the previous mask is undone
+                    _undo(domains, trail)
+                    frame[3] = None
+                    del changed[changed_count:]
+                if k == len(masks) or nodes_left[0] <= 0 or self._is_stopped():
+                    stack.pop()
+                    continue
+                frame[2] += 1
+                nodes_left[0] -= 1
+
+                trail = frame[3] = [(cell, domains[cell])]
+                domains[cell] = 1 << masks[k]
+                if self._propagate(domains, (cell,), trail) is None:
+                    continue
+                previous = dict()  # cell -> its domain before the mask
+                for i, domain in trail:
+                    previous.setdefault(i, domain)
+                for i, domain in previous.items():
+                    lower_bound += _min_cost(forks[i], domains[i]) - _min_cost(forks[i], domain)
+                if bound is not None and lower_bound >= bound[0]:
+                    continue
+                changed.extend(previous)
+                if not self._is_consistent(snapshot, domains, changed):
+                    continue
+
+                position = next_undecided(position)
+                if position == count:  # all cells are decided
+                    yield lower_bound
+                else:
+                    stack.append(branch(position, len(changed), lower_bound))
+        finally:
+            for frame in reversed(stack):
+                if frame[3] is not None:
+                    _undo(domains, frame[3])
+
+
+class HintTracker:
+    """ It keeps cells, which orientations are forced by propagation
+        (their domains have only one mask), but which are turned wrong now.
+        Domains don't depend on current orientations (only on shapes of forks),
+        so they are computed once and a turn changes only the turned cell """
+    NOT_FORCED = 0xFF
+
+    def __init__(self, domains: list[int], forks: bytes):
+        """ domains - see Solver.domains, forks - current fork masks """
+        # [cell] -> forced mask or NOT_FORCED
+        self._forced = bytes(_masks_of(domain)[0] if _is_decided(domain) else self.NOT_FORCED
+                             for domain in domains)
+        self._wrong = {i for i, mask in enumerate(forks)
+                       if self._forced[i] != self.NOT_FORCED and self._forced[i] != mask}
+
+    def update(self, cell: int, mask: int) -> None:
+        """ It should be called when the cell has been turned """
+        forced = self._forced[cell]
+        if forced == self.NOT_FORCED:
+            return
+        if forced == mask:
+            self._wrong.discard(cell)
+        else:
+            self._wrong.add(cell)
+
+    def hint(self) -> int | None:
+        """ It returns a wrong turned cell with a forced orientation (the first
+            one in the net) or None if all of them are turned right """
+        return min(self._wrong) if self._wrong else None
+
+    def forced_mask(self, cell: int) -> int | None:
+        forced = self._forced[cell]
+        return None if forced == self.NOT_FORCED else forced
+
+    @property
+    def wrong_count(self) -> int:
+        return len(self._wrong)
+
+
+def _is_decided(domain: int) -> bool:
+    return domain != 0 and not domain & (domain - 1)
+
+
+def _undo(domains: list[int], trail: list[tuple[int, int]]) -> None:
+    for cell, domain in reversed(trail):
+        domains[cell] = domain
+
+
+def min_turns(forks: bytes, neighbours: tuple[tuple[int, int, int, int], ...],
+    known: bytes | None=None, nodes_limit: int=Solver.DEFAULT_NODES_LIMIT,
+    stop: Event | None=None) -> int | None:
+    """ It returns the minimal number of turns to assemble the net
+        (or None if it can't be assembled). See Solver.solve() """
+    solution = Solver(forks, neighbours, stop=stop).solve(known, nodes_limit)
+    return None if solution is None else solution.turns_count
+
+def make_unique(forks: bytearray, neighbours: tuple[tuple[int, int, int, int], ...],
+    rng=random, max_repairs: int=MAX_REPAIRS) -> Solver | None:
+    """ It changes an assembled net (a maze) a little until it has the only
+        solution. A connection of another solution is added to every ambiguous
+        region (see reroute_maze()). It returns the solver of the changed net
+        (its domains don't depend on orientations, so it could be reused for
+        the disassembled net) or None if it has failed.
+        Every repair builds a new solver, so it takes a few times as long as
+        a Solver() (e.g. about 0.3 s more for a 100x100 net) """
+    for _ in range(max_repairs):
+        solver = Solver(forks, neighbours)
+        alternatives = solver.region_alternatives()
+        if not alternatives:
+            solutions = solver.find_solutions(2)
+            if solutions is None or not solutions:
+                return None
+            if len(solutions) == 1:
+                return solver
+            # It's ambiguous only as a whole (the regions conflict with each other)
+            alternatives = [dict(enumerate(solution)) for solution in solutions]
+        for alternative in alternatives:
+            connections = [(i, d) for i, mask in alternative.items()
+                           for d in range(DIRECTIONS_COUNT)
+                           if mask & (1 << d) and not forks[i] & (1 << d)]
+            if connections:  # it isn't the maze's own way
+                i, d = rng.choice(connections)
+                if not forks[i] & (1 << d):  # it could be added by another region
+                    reroute_maze(forks, neighbours, i, d, rng)
+    return None
@@ -33,4 +33,12 @@ SETTINGS_INSTANCE = (
     "10\n"
     "# message_hor_indent: int (>= 0)\n"
     "10\n"
+    "# event_driven_loop: bool (0 - no or 1 - yes)\n"
+    "0\n"
+    "# smooth_sprites: bool (0 - no or 1 - yes)\n"
+    "0\n"
+    "# texture_renderer: bool (0 - no or 1 - yes)\n"
+    "0\n"
+    "# profiler_dump_file: str (*.json or *.csv, empty - no dump)\n"
+    "\n"
 )
@@ -5,6 +5,7 @@ https://github.com/vitsmirnov
 2024
 """
 
+from collections import OrderedDict
 from enum import Enum
 
 import pygame as pg
@@ -14,11 +15,19 @@ import pygame as pg
 class Align: ...
 class Message: ...
 class StaticMessage: ...
+class Overlay: ...
 
 
 # It's not possible to use default font as a parameter without font.init() !?
 pg.font.init()
 
+# Rendered lines are cached (see render_line()), the least recently used
+# ones are dropped
+LINE_CACHE_SIZE = 256
+_line_cache: OrderedDict[tuple, pg.Surface] = OrderedDict()
+# Fonts are created once (see get_font())
+_fonts: dict[tuple[str | None, int], pg.font.Font] = {}
+
 
 class Align(Enum):
     LEFT: int = 0
@@ -37,9 +46,34 @@ def get_align_x(align: Align, text_width: int, dest_width: int,
             return dest_width - text_width - indent
 
 
+def get_font(name: str | None=None, size: int=25) -> pg.font.Font:
+    """ It returns the same Font object for the same name and size
+        (name is a file name, None - the default font) """
+    font = _fonts.get((name, size))
+    if font is None:
+        font = _fonts[(name, size)] = pg.font.Font(name, size)
+    return font
+
+
+def render_line(font: pg.font.Font, text: str,
+                color: tuple[int, int, int]=(0, 0, 0)) -> pg.Surface:
+    """ It works like font.render(text, True, color), but a line is rendered
+        once while it's in the cache (the result mustn't be changed) """
+    key = (font, text, tuple(color))
+    image = _line_cache.get(key)
+    if image is not None:
+        _line_cache.move_to_end(key)
+        return image
+    image = font.render(text, True, color, None)
+    _line_cache[key] = image
+    if len(_line_cache) > LINE_CACHE_SIZE:
+        _line_cache.popitem(last=False)
+    return image
+
+
 def render_text_board(  # Is this too much?
     msgs: tuple[str] | list[str],
-    font: pg.font.Font=pg.font.Font(None, 25),
+    font: pg.font.Font=get_font(None, 25),
     text_align: Align=Align.CENTER,
     text_color: tuple[int, int, int]=(0, 0, 0),
     bg_color: tuple[int, int, int]=(255, 255, 255),
@@ -54,7 +88,7 @@ def render_text_board(  # Is this too much?
     width = 0
     height = vertical_indent
     for msg in msgs:
-        image = font.render(msg, True, text_color, None)
+        image = render_line(font, msg, text_color)
         images.append(image)
         
         if image.get_width() > width:
@@ -111,9 +145,38 @@ def show_rendered_message(
     """ It returns an occured event
         if pos is None pos will be centred
         (it won't work correct if pos is negative) """
+    draw_rendered_message(msg_surface, screen, pos, fit_into)
+    
+    pg.display.flip()
+
+    return wait_for_event(exit_condition)
+
+
+def draw_rendered_message(
+    msg_surface: pg.Surface,
+    screen: pg.surface.Surface,
+    pos: tuple[int, int] | None=None,  # if pos == None pos will be centred
+    fit_into: bool=True
+    ) -> pg.Rect:
+    """ It draws the message on screen (without flip() and waiting)
+        and returns its rect """
+    msg_surface, text_rect = place_rendered_message(msg_surface, screen.get_rect(),
+        pos, fit_into)
+    screen.blit(msg_surface, text_rect) #.topleft)
+    return text_rect
+
+
+def place_rendered_message(
+    msg_surface: pg.Surface,
+    screen_rect: pg.Rect,
+    pos: tuple[int, int] | None=None,  # if pos == None pos will be centred
+    fit_into: bool=True
+    ) -> tuple[pg.Surface, pg.Rect]:
+    """ It returns the message surface (scaled, if it doesn't fit into the screen)
+        and its rect on the screen """
     text_rect = msg_surface.get_rect() #.copy()  # It won't change
 
-    was_scaled = fit_into and fit_rect(text_rect, screen.get_rect())
+    was_scaled = fit_into and fit_rect(text_rect, screen_rect)
     if was_scaled:
         msg_surface = pg.transform.smoothscale(
             msg_surface, (text_rect.width, text_rect.height))
@@ -121,20 +184,16 @@ def show_rendered_message(
 
     # This should be checked
     if pos == None:
-        text_rect.center = screen.get_rect().center
+        text_rect.center = screen_rect.center
     elif was_scaled:  # pos != None
         text_rect.topleft = pos #deepcopy(pos)
-        if text_rect.right > screen.get_width():
-            text_rect.centerx = screen.get_rect().centerx
-        if text_rect.bottom > screen.get_height():
-            text_rect.centery = screen.get_rect().centery
+        if text_rect.right > screen_rect.width:
+            text_rect.centerx = screen_rect.centerx
+        if text_rect.bottom > screen_rect.height:
+            text_rect.centery = screen_rect.centery
     else:  # pos != None and rect wasn't scaled!
         text_rect.topleft = pos
-    screen.blit(msg_surface, text_rect) #.topleft)
-    
-    pg.display.flip()
-
-    return wait_for_event(exit_condition)
+    return msg_surface, text_rect
 
 
 def show_custom_message( # Is this too much?
@@ -143,7 +202,7 @@ def show_custom_message( # Is this too much?
     exit_condition=is_key_down_esc_or_return,
     pos: tuple[int, int] | None=None,  # if pos == None pos will be centred
     fit_into: bool=True,
-    font: pg.font.Font=pg.font.Font(None, 25),
+    font: pg.font.Font=get_font(None, 25),
     text_align: Align=Align.CENTER,
     text_color: tuple[int, int, int]=(0, 0, 0),
     bg_color: tuple[int, int, int]=(255, 255, 255),
@@ -201,7 +260,7 @@ class Message:
         exit_condition=is_key_down_esc_or_return,
         pos: tuple[int, int] | None=None,
         fit_into: bool=True,
-        font: pg.font.Font=pg.font.Font(None, 25),
+        font: pg.font.Font=get_font(None, 25),
         text_align: Align=Align.CENTER,
         text_color: tuple[int, int, int]=(0, 0, 0),
         bg_color: tuple[int, int, int]=(255, 255, 255),
@@ -229,10 +288,11 @@ class Message:
         # self._exit_condition = lambda event: (
         #     event.type == pg.KEYDOWN and event.key in self._exit_keys)
         
-        self._render(msg)
+        self.render(msg)
 
 
-    def _render(self, msg: tuple[str] | list[str]) -> pg.Surface:
+    def render(self, msg: tuple[str] | list[str]) -> None:
+        """ It changes the message text """
         self._message_image = render_text_board(msg, self._font, self._text_align,
             self._text_color, self._bg_color, self._frame_width, self._frame_color,
             self._vertical_indent, self._horizontal_indent)
@@ -242,10 +302,21 @@ class Message:
     def show(self, msg: tuple[str] | list[str] | None=None) -> pg.event.Event:
         """ If msg is None, it will show previous rendered message """
         if msg != None:
-            self._render(msg)
+            self.render(msg)
         return show_rendered_message(self._message_image, self.screen,
             self.exit_condition, self.pos, self.fit_into)
 
+    def draw(self) -> pg.Rect:
+        """ It draws the message on the screen without waiting (see Overlay) """
+        return draw_rendered_message(self._message_image, self.screen,
+            self.pos, self.fit_into)
+
+    def place(self, screen_rect: pg.Rect | None=None) -> tuple[pg.Surface, pg.Rect]:
+        """ The message image and its rect on the screen (for drawing it
+            in another way, e.g. by a renderer) """
+        return place_rendered_message(self._message_image,
+            screen_rect or self.screen.get_rect(), self.pos, self.fit_into)
+
     def __call__(self, msg: tuple[str] | list[str] | None=None) -> pg.event.Event:
         return self.show(msg)
     
@@ -259,7 +330,7 @@ class StaticMessage:
         exit_condition=is_key_down_esc_or_return,
         pos: tuple[int, int] | None=None,
         fit_into: bool=True,
-        font: pg.font.Font=pg.font.Font(None, 25),
+        font: pg.font.Font=get_font(None, 25),
         text_align: Align=Align.CENTER,
         text_color: tuple[int, int, int]=(0, 0, 0),
         bg_color: tuple[int, int, int]=(255, 255, 255),
@@ -284,5 +355,53 @@ class StaticMessage:
         return show_rendered_message(self._message_image, self.screen,
             self.exit_condition, self.pos, self.fit_into)
 
+    def draw(self) -> pg.Rect:
+        """ It draws the message on the screen without waiting (see Overlay) """
+        return draw_rendered_message(self._message_image, self.screen,
+            self.pos, self.fit_into)
+
+    def place(self, screen_rect: pg.Rect | None=None) -> tuple[pg.Surface, pg.Rect]:
+        """ The message image and its rect on the screen (for drawing it
+            in another way, e.g. by a renderer) """
+        return place_rendered_message(self._message_image,
+            screen_rect or self.screen.get_rect(), self.pos, self.fit_into)
+
     def __call__(self, msg: tuple[str] | list[str] | None=None) -> pg.event.Event:
         return self.show(msg)
+
+
+class Overlay:
+    """ Messages shown over the screen without blocking (unlike show()).
+        The main loop draws them over the screen (draw()) and sends input
+        to the topmost one, e.g. by its data (anything the main loop needs,
+        like commands of the message). The topmost message is the last one """
+    def __init__(self) -> None:
+        self._layers: list[tuple[Message | StaticMessage, object]] = []
+
+    def __len__(self) -> int:
+        return len(self._layers)
+
+    def push(self, message: Message | StaticMessage, data: object=None) -> None:
+        self._layers.append((message, data))
+
+    def pop(self) -> object:
+        """ It removes the topmost message and returns its data """
+        return self._layers.pop()[1]
+
+    def __iter__(self):  # -> Iterator[Message | StaticMessage]
+        """ Messages from the bottom one to the topmost one """
+        return (message for message, _ in self._layers)
+
+    @property
+    def top_data(self) -> object:
+        """ Data of the topmost message (there should be a message) """
+        return self._layers[-1][1]
+
+    def draw(self) -> pg.Rect | None:
+        """ It draws all the messages (the topmost one is drawn last) and
+            returns the rect of them (None if there are no messages) """
+        rect = None
+        for message in self:
+            message_rect = message.draw()
+            rect = message_rect if rect is None else rect.union(message_rect)
+        return rect